@@ -4,10 +4,17 @@ Provides flight and hotel search functionality using Amadeus API
 """
 
 import os
+import copy
+from itertools import islice
 from amadeus import Client, ResponseError
-from typing import List, Dict, Optional
-from datetime import datetime, timedelta
-import pytz
+from cachetools import LRUCache, TTLCache
+from typing import Iterator, List, Dict, Optional
+
+from services.iata_codes import is_valid_iata
+
+# Flight offers are cached briefly (10 minutes) since prices move quickly
+FLIGHT_CACHE_TTL = 600
+
 
 class AmadeusClient:
     def __init__(self):
@@ -23,6 +30,11 @@ class AmadeusClient:
             client_secret=api_secret,
             hostname='production'  # Use 'test' for testing environment, 'production' for live
         )
+        
+        # Successful flight searches keyed on normalized search parameters
+        self._flight_cache = TTLCache(maxsize=256, ttl=FLIGHT_CACHE_TTL)
+        # City name -> IATA code lookups never change, memoize them per process
+        self._airport_code_cache = LRUCache(maxsize=4096)
     
     def search_flights(self, origin: str, destination: str, departure_date: str, 
                       return_date: Optional[str] = None, adults: int = 1, 
@@ -42,6 +54,18 @@ class AmadeusClient:
         Returns:
             Dict containing flight search results
         """
+        if not (is_valid_iata(origin) and is_valid_iata(destination)):
+            return {
+                'success': False,
+                'error': f"Invalid IATA code: {origin!r} -> {destination!r}",
+                'error_code': None
+            }
+        
+        cache_key = (origin.upper(), destination.upper(), departure_date, return_date or '', adults, children, infants)
+        cached = self._flight_cache.get(cache_key)
+        if cached is not None:
+            return copy.deepcopy(cached)
+        
         try:
             # Build search parameters
             search_params = {
@@ -60,12 +84,14 @@ class AmadeusClient:
             # Perform flight search
             response = self.amadeus.shopping.flight_offers_search.get(**search_params)
             
-            return {
+            result = {
                 'success': True,
                 'data': response.data,
                 'meta': response.meta,
                 'dictionaries': response.dictionaries if hasattr(response, 'dictionaries') else {}
             }
+            self._flight_cache[cache_key] = copy.deepcopy(result)
+            return result
             
         except ResponseError as error:
             return {
@@ -89,6 +115,13 @@ class AmadeusClient:
         Returns:
             Dict containing hotel search results
         """
+        if not is_valid_iata(city_code):
+            return {
+                'success': False,
+                'error': f"Invalid IATA city code: {city_code!r}",
+                'error_code': None
+            }
+        
         try:
             # First, search for hotels in the specified city
             hotel_list = self.amadeus.shopping.hotel_offers.get(
@@ -122,108 +155,137 @@ class AmadeusClient:
         Returns:
             IATA airport code or None if not found
         """
+        cache_key = city_name.strip().lower()
+        
+        cached_code = self._airport_code_cache.get(cache_key)
+        if cached_code:
+            return cached_code
+        
         try:
             response = self.amadeus.reference_data.locations.get(
                 keyword=city_name,
                 subType='AIRPORT,CITY'
             )
             
-            if response.data and len(response.data) > 0:
-                # Return the first airport code found
-                for location in response.data:
-                    if location.get('subType') == 'AIRPORT':
-                        return location.get('iataCode')
+            # Return the first airport code found
+            airport_code = next(
+                (location.get('iataCode') for location in response.data or [] if location.get('subType') == 'AIRPORT'),
+                None
+            )
             
-            return None
+            # Only resolved codes are memoized; a miss is looked up again next time
+            if airport_code:
+                self._airport_code_cache[cache_key] = airport_code
+            return airport_code
             
         except ResponseError:
             return None
     
-    def format_flight_results(self, flight_data: Dict) -> List[Dict]:
+    def format_flight_results(self, flight_data: Dict, limit: Optional[int] = None) -> List[Dict]:
         """
         Format flight search results for easier consumption
         
         Args:
             flight_data: Raw flight data from Amadeus API
+            limit: Maximum number of offers to format (all when None)
             
         Returns:
             List of formatted flight information
         """
-        if not flight_data.get('success') or not flight_data.get('data'):
-            return []
+        return list(islice(self.iter_flight_results(flight_data), limit))
+    
+    def iter_flight_results(self, flight_data: Dict) -> Iterator[Dict]:
+        """
+        Lazily format flight offers one at a time, so callers that only show the
+        first few can stop without formatting the rest
         
-        formatted_flights = []
+        Args:
+            flight_data: Raw flight data from Amadeus API
+            
+        Yields:
+            Formatted flight information
+        """
+        if not flight_data.get('success') or not flight_data.get('data'):
+            return
         
         for offer in flight_data['data']:
-            flight_info = {
+            price = offer.get('price') or {}
+            yield {
                 'id': offer.get('id'),
-                'price': offer.get('price', {}).get('total'),
-                'currency': offer.get('price', {}).get('currency'),
-                'itineraries': []
-            }
-            
-            for itinerary in offer.get('itineraries', []):
-                itinerary_info = {
-                    'duration': itinerary.get('duration'),
-                    'segments': []
-                }
-                
-                for segment in itinerary.get('segments', []):
-                    segment_info = {
-                        'departure': {
-                            'airport': segment.get('departure', {}).get('iataCode'),
-                            'time': segment.get('departure', {}).get('at')
-                        },
-                        'arrival': {
-                            'airport': segment.get('arrival', {}).get('iataCode'),
-                            'time': segment.get('arrival', {}).get('at')
-                        },
-                        'airline': segment.get('carrierCode'),
-                        'flight_number': segment.get('number'),
-                        'aircraft': segment.get('aircraft', {}).get('code')
+                'price': price.get('total'),
+                'currency': price.get('currency'),
+                'itineraries': [
+                    {
+                        'duration': itinerary.get('duration'),
+                        'segments': [self._format_segment(segment) for segment in itinerary.get('segments', [])]
                     }
-                    itinerary_info['segments'].append(segment_info)
-                
-                flight_info['itineraries'].append(itinerary_info)
-            
-            formatted_flights.append(flight_info)
-        
-        return formatted_flights
+                    for itinerary in offer.get('itineraries', [])
+                ]
+            }
     
-    def format_hotel_results(self, hotel_data: Dict) -> List[Dict]:
+    @staticmethod
+    def _format_segment(segment: Dict) -> Dict:
+        """Flatten one flight segment"""
+        departure = segment.get('departure') or {}
+        arrival = segment.get('arrival') or {}
+        return {
+            'departure': {
+                'airport': departure.get('iataCode'),
+                'time': departure.get('at')
+            },
+            'arrival': {
+                'airport': arrival.get('iataCode'),
+                'time': arrival.get('at')
+            },
+            'airline': segment.get('carrierCode'),
+            'flight_number': segment.get('number'),
+            'aircraft': (segment.get('aircraft') or {}).get('code')
+        }
+    
+    def format_hotel_results(self, hotel_data: Dict, limit: Optional[int] = None) -> List[Dict]:
         """
         Format hotel search results for easier consumption
         
         Args:
             hotel_data: Raw hotel data from Amadeus API
+            limit: Maximum number of hotels to format (all when None)
             
         Returns:
             List of formatted hotel information
         """
-        if not hotel_data.get('success') or not hotel_data.get('data'):
-            return []
+        return list(islice(self.iter_hotel_results(hotel_data), limit))
+    
+    def iter_hotel_results(self, hotel_data: Dict) -> Iterator[Dict]:
+        """
+        Lazily format hotels one at a time
         
-        formatted_hotels = []
+        Args:
+            hotel_data: Raw hotel data from Amadeus API
+            
+        Yields:
+            Formatted hotel information
+        """
+        if not hotel_data.get('success') or not hotel_data.get('data'):
+            return
         
         for hotel in hotel_data['data']:
-            hotel_info = {
-                'hotel_id': hotel.get('hotel', {}).get('hotelId'),
-                'name': hotel.get('hotel', {}).get('name'),
-                'rating': hotel.get('hotel', {}).get('rating'),
-                'description': hotel.get('hotel', {}).get('description', {}).get('text'),
-                'offers': []
-            }
-            
+            hotel_details = hotel.get('hotel') or {}
+            offers = []
             for offer in hotel.get('offers', []):
-                offer_info = {
+                price = offer.get('price') or {}
+                room = offer.get('room') or {}
+                offers.append({
                     'id': offer.get('id'),
-                    'price': offer.get('price', {}).get('total'),
-                    'currency': offer.get('price', {}).get('currency'),
-                    'room_type': offer.get('room', {}).get('type'),
-                    'room_description': offer.get('room', {}).get('description', {}).get('text')
-                }
-                hotel_info['offers'].append(offer_info)
+                    'price': price.get('total'),
+                    'currency': price.get('currency'),
+                    'room_type': room.get('type'),
+                    'room_description': (room.get('description') or {}).get('text')
+                })
             
-            formatted_hotels.append(hotel_info)
-        
-        return formatted_hotels
\ No newline at end of file
+            yield {
+                'hotel_id': hotel_details.get('hotelId'),
+                'name': hotel_details.get('name'),
+                'rating': hotel_details.get('rating'),
+                'description': (hotel_details.get('description') or {}).get('text'),
+                'offers': offers
+            }
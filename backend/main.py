@@ -1,7 +1,7 @@
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
-from typing import Optional, Dict, List, Any
+from typing import Optional, Dict, List, Any, Tuple
 from dotenv import load_dotenv
 import os
 from openai import OpenAI
@@ -13,9 +13,10 @@ import asyncio
 from concurrent.futures import ThreadPoolExecutor, as_completed
 
 # Import our services
-from services.amadeus_service import AmadeusService
+from services.amadeus_service import get_amadeus_service
 from services.intent_detector import IntentDetector
 from services.cache_manager import CacheManager
+from services.iata_codes import is_valid_iata
 
 
 # Configure logging
@@ -36,9 +37,12 @@ if not api_key:
 print(f"OpenAI API key loaded: {api_key[:10]}..." if api_key else "No API key found")
 client = OpenAI(api_key=api_key)
 
+# Upper bound on the itinerary endpoint's destination geocode (Amadeus lookup plus Nominatim fallback)
+GEOCODE_TIMEOUT_SECONDS = float(os.getenv("GEOCODE_TIMEOUT_SECONDS", "15"))
+
 # Initialize services
 try:
-    amadeus_service = AmadeusService()
+    amadeus_service = get_amadeus_service()
     print("AmadeusService initialized successfully")
 except Exception as e:
     print(f"Error initializing AmadeusService: {e}")
@@ -904,48 +908,46 @@ Output:
     
     return system_prompt
 
+# Map airline names to their booking URLs
+_AIRLINE_BOOKING_URLS = {
+    "Air France": "https://www.airfrance.com",
+    "Delta Airlines": "https://www.delta.com",
+    "American Airlines": "https://www.aa.com",
+    "United Airlines": "https://www.united.com",
+    "Lufthansa": "https://www.lufthansa.com",
+    "British Airways": "https://www.britishairways.com",
+    "KLM": "https://www.klm.com",
+    "Iberia": "https://www.iberia.com",
+    "Alitalia": "https://www.alitalia.com",
+    "Swiss": "https://www.swiss.com",
+    "Austrian": "https://www.austrian.com",
+    "SAS": "https://www.sas.se",
+    "TAP Air Portugal": "https://www.flytap.com",
+    "Virgin Atlantic": "https://www.virgin-atlantic.com",
+    "Emirates": "https://www.emirates.com",
+    "Qatar Airways": "https://www.qatarairways.com",
+    "Turkish Airlines": "https://www.turkishairlines.com",
+    "Aeroflot": "https://www.aeroflot.com",
+    "Air Canada": "https://www.aircanada.com",
+    "WestJet": "https://www.westjet.com",
+    "JetBlue": "https://www.jetblue.com",
+    "Southwest": "https://www.southwest.com",
+    "Alaska Airlines": "https://www.alaskaair.com",
+    "Hawaiian Airlines": "https://www.hawaiianairlines.com",
+    "Spirit Airlines": "https://www.spirit.com",
+    "Frontier Airlines": "https://www.flyfrontier.com",
+    "Allegiant Air": "https://www.allegiantair.com"
+}
+
 def _generate_booking_link(airline_name, flight_code):
     """Generate booking link for a flight based on airline and flight code"""
     if not airline_name or not flight_code:
         return "https://www.google.com/search?q=flight+booking"
     
-    # Map airline names to their booking URLs
-    airline_booking_urls = {
-        "Air France": "https://www.airfrance.com",
-        "Delta Airlines": "https://www.delta.com",
-        "American Airlines": "https://www.aa.com",
-        "United Airlines": "https://www.united.com",
-        "Lufthansa": "https://www.lufthansa.com",
-        "British Airways": "https://www.britishairways.com",
-        "KLM": "https://www.klm.com",
-        "Iberia": "https://www.iberia.com",
-        "Alitalia": "https://www.alitalia.com",
-        "Swiss": "https://www.swiss.com",
-        "Austrian": "https://www.austrian.com",
-        "SAS": "https://www.sas.se",
-        "TAP Air Portugal": "https://www.flytap.com",
-        "Virgin Atlantic": "https://www.virgin-atlantic.com",
-        "Emirates": "https://www.emirates.com",
-        "Qatar Airways": "https://www.qatarairways.com",
-        "Turkish Airlines": "https://www.turkishairlines.com",
-        "Aeroflot": "https://www.aeroflot.com",
-        "Air Canada": "https://www.aircanada.com",
-        "WestJet": "https://www.westjet.com",
-        "JetBlue": "https://www.jetblue.com",
-        "Southwest": "https://www.southwest.com",
-        "Alaska Airlines": "https://www.alaskaair.com",
-        "Hawaiian Airlines": "https://www.hawaiianairlines.com",
-        "Spirit Airlines": "https://www.spirit.com",
-        "Frontier Airlines": "https://www.flyfrontier.com",
-        "Allegiant Air": "https://www.allegiantair.com"
-    }
-    
     # Get the base URL for the airline
-    base_url = airline_booking_urls.get(airline_name, "https://www.google.com/search?q=flight+booking")
-    
     # For most airlines, we'll use the base URL and let users search for the specific flight
     # Some airlines have specific flight search patterns, but for simplicity, we'll use the base URL
-    return base_url
+    return _AIRLINE_BOOKING_URLS.get(airline_name, "https://www.google.com/search?q=flight+booking")
 
 def clean_markdown_formatting(text):
     """Remove excessive markdown formatting like __ and clean up ** patterns"""
@@ -2485,6 +2487,22 @@ async def fetch_itinerary_data(req: Dict[str, Any]):
         hotels = []
         activities = []
         
+        # Destination coordinates are only needed when the hotels come back without any,
+        # so geocode lazily, at most once per request, off the event loop and with a timeout
+        geocoded_coords = {}
+        
+        async def get_destination_coords():
+            if 'coords' not in geocoded_coords:
+                try:
+                    geocoded_coords['coords'] = await asyncio.wait_for(
+                        asyncio.to_thread(amadeus_service.get_city_coordinates, destination_name),
+                        timeout=GEOCODE_TIMEOUT_SECONDS
+                    )
+                except Exception as coord_error:
+                    logger.warn(f"[ITINERARY_DATA] Could not get coordinates for {destination_name}: {coord_error!r}")
+                    geocoded_coords['coords'] = None
+            return geocoded_coords['coords']
+        
         # Fetch hotels - try with destination_code or destination_name
         if check_in and check_out:
             try:
@@ -2530,7 +2548,7 @@ async def fetch_itinerary_data(req: Dict[str, Any]):
                         if destination_name:
                             try:
                                 logger.info(f"[ITINERARY_DATA] Attempting fallback: getting coordinates for {destination_name}")
-                                coords = amadeus_service.get_city_coordinates(destination_name)
+                                coords = await get_destination_coords()
                                 if coords:
                                     latitude, longitude = coords
                                     logger.info(f"[ITINERARY_DATA] Got coordinates: {latitude}, {longitude}")
@@ -2547,53 +2565,58 @@ async def fetch_itinerary_data(req: Dict[str, Any]):
             logger.warn(f"[ITINERARY_DATA] Missing check_in or check_out dates: check_in={check_in}, check_out={check_out}")
         
         # Fetch activities - need coordinates for activities
-        # For now, we'll return empty activities list and let frontend handle it
-        # In production, you'd need to geocode the destination to get coordinates
         try:
-            # Try to get coordinates from hotel data if available
-            if hotels and len(hotels) > 0:
+            latitude = longitude = None
+            # Prefer coordinates from hotel data if available
+            if hotels:
                 first_hotel = hotels[0]
                 latitude = first_hotel.get('latitude')
                 longitude = first_hotel.get('longitude')
+            
+            # Otherwise fall back to geocoding the destination (reused if the hotel fallback already did)
+            if not (latitude and longitude) and destination_name:
+                coords = await get_destination_coords()
+                if coords:
+                    latitude, longitude = coords
+            
+            if latitude and longitude:
+                activity_result = amadeus_service.search_activities(
+                    latitude=float(latitude),
+                    longitude=float(longitude),
+                    radius=20  # 20km radius
+                )
                 
-                if latitude and longitude:
-                    activity_result = amadeus_service.search_activities(
-                        latitude=float(latitude),
-                        longitude=float(longitude),
-                        radius=20  # 20km radius
+                if not activity_result.get('error') and activity_result.get('activities'):
+                    activities = activity_result['activities'][:30]  # Limit to 30 activities
+                    
+                    # Apply preference filters to activities
+                    # Calculate trip duration from check_in/check_out
+                    trip_duration_days = None
+                    if check_in and check_out:
+                        try:
+                            check_in_dt = datetime.strptime(check_in, "%Y-%m-%d")
+                            check_out_dt = datetime.strptime(check_out, "%Y-%m-%d")
+                            trip_duration_days = (check_out_dt - check_in_dt).days
+                        except (ValueError, TypeError) as date_error:
+                            logger.debug(f"[ITINERARY_DATA] Could not parse dates for trip duration: {date_error}")
+                    
+                    # Get preferences from request
+                    request_preferences = req.get('preferences')
+                    
+                    # Apply filters
+                    activities = apply_preference_filters_to_activities(
+                        activities,
+                        preferences=request_preferences,
+                        trip_duration_days=trip_duration_days,
+                        context_label="fetch_itinerary"
                     )
                     
-                    if not activity_result.get('error') and activity_result.get('activities'):
-                        activities = activity_result['activities'][:30]  # Limit to 30 activities
-                        
-                        # Apply preference filters to activities
-                        # Calculate trip duration from check_in/check_out
-                        trip_duration_days = None
-                        if check_in and check_out:
-                            try:
-                                check_in_dt = datetime.strptime(check_in, "%Y-%m-%d")
-                                check_out_dt = datetime.strptime(check_out, "%Y-%m-%d")
-                                trip_duration_days = (check_out_dt - check_in_dt).days
-                            except (ValueError, TypeError) as date_error:
-                                logger.debug(f"[ITINERARY_DATA] Could not parse dates for trip duration: {date_error}")
-                        
-                        # Get preferences from request
-                        request_preferences = req.get('preferences')
-                        
-                        # Apply filters
-                        activities = apply_preference_filters_to_activities(
-                            activities,
-                            preferences=request_preferences,
-                            trip_duration_days=trip_duration_days,
-                            context_label="fetch_itinerary"
-                        )
-                        
-                        # Generate fixed header template for activities
-                        destination_city = destination_name or destination_code or "your destination"
-                        activity_result['_header_title'] = f"Top activities in {destination_city}"
-                        activity_result['_subtitle'] = "Ranked by how well they match your preferences."
-                        
-                        logger.info(f"[ITINERARY_DATA] Found {len(activities)} activities")
+                    # Generate fixed header template for activities
+                    destination_city = destination_name or destination_code or "your destination"
+                    activity_result['_header_title'] = f"Top activities in {destination_city}"
+                    activity_result['_subtitle'] = "Ranked by how well they match your preferences."
+                    
+                    logger.info(f"[ITINERARY_DATA] Found {len(activities)} activities")
         except Exception as e:
             logger.error(f"[ITINERARY_DATA] Error fetching activities: {e}")
         
@@ -2974,36 +2997,8 @@ async def chat(req: ChatRequest):
                     except ValueError:
                         logger.warning(f"[MAIN] ⚠️ Invalid departure date format: {departure_date}")
                     
-                    # Check if origin needs airport code conversion and find all airports
-                    origin_airports = []
-                    if not _is_iata_code(origin):
-                        logger.info(f"[MAIN] Converting origin '{origin}' to IATA code(s)")
-                        location_result = amadeus_service.get_airport_city_search(keyword=origin)
-                        if location_result and not location_result.get('error') and location_result.get('locations'):
-                            airports = [loc for loc in location_result['locations'] if loc.get('type') == 'AIRPORT']
-                            if airports:
-                                origin_airports = [a.get('code') for a in airports if a.get('code')]
-                                logger.info(f"[MAIN] Found {len(origin_airports)} airports for {origin}: {origin_airports}")
-                            else:
-                                # No airports found, use first location
-                                origin_airports = [location_result['locations'][0].get('code', origin)]
-                    else:
-                        origin_airports = [origin]
-                    
-                    # Check if destination needs airport code conversion and find all airports
-                    dest_airports = []
-                    if not _is_iata_code(destination):
-                        logger.info(f"[MAIN] Converting destination '{destination}' to IATA code(s)")
-                        location_result = amadeus_service.get_airport_city_search(keyword=destination)
-                        if location_result and not location_result.get('error') and location_result.get('locations'):
-                            airports = [loc for loc in location_result['locations'] if loc.get('type') == 'AIRPORT']
-                            if airports:
-                                dest_airports = [a.get('code') for a in airports if a.get('code')]
-                                logger.info(f"[MAIN] Found {len(dest_airports)} airports for {destination}: {dest_airports}")
-                            else:
-                                dest_airports = [location_result['locations'][0].get('code', destination)]
-                    else:
-                        dest_airports = [destination]
+                    # Resolve origin and destination to airport codes (lookups run concurrently)
+                    origin_airports, dest_airports = _resolve_route_airports(origin, destination)
                     
                     # Search flights from all origin airports to all destination airports
                     all_flights = []
@@ -3179,35 +3174,8 @@ async def chat(req: ChatRequest):
                             logger.warning(f"Missing departure date: departure_date={departure_date}")
                             amadeus_data = {"error": "Missing departure date. Please provide a departure date (e.g., 'November 3rd' or '11/03/2024')."}
                         else:
-                            # Check if origin needs airport code conversion and find all airports
-                            origin_airports = []
-                            if not _is_iata_code(origin):
-                                logger.info(f"Converting origin '{origin}' to IATA code(s)")
-                                location_result = amadeus_service.get_airport_city_search(keyword=origin)
-                                if location_result and not location_result.get('error') and location_result.get('locations'):
-                                    airports = [loc for loc in location_result['locations'] if loc.get('type') == 'AIRPORT']
-                                    if airports:
-                                        origin_airports = [a.get('code') for a in airports if a.get('code')]
-                                        logger.info(f"Found {len(origin_airports)} airports for {origin}: {origin_airports}")
-                                    else:
-                                        origin_airports = [location_result['locations'][0].get('code', origin)]
-                            else:
-                                origin_airports = [origin]
-                            
-                            # Check if destination needs airport code conversion and find all airports
-                            dest_airports = []
-                            if not _is_iata_code(destination):
-                                logger.info(f"Converting destination '{destination}' to IATA code(s)")
-                                location_result = amadeus_service.get_airport_city_search(keyword=destination)
-                                if location_result and not location_result.get('error') and location_result.get('locations'):
-                                    airports = [loc for loc in location_result['locations'] if loc.get('type') == 'AIRPORT']
-                                    if airports:
-                                        dest_airports = [a.get('code') for a in airports if a.get('code')]
-                                        logger.info(f"Found {len(dest_airports)} airports for {destination}: {dest_airports}")
-                                    else:
-                                        dest_airports = [location_result['locations'][0].get('code', destination)]
-                            else:
-                                dest_airports = [destination]
+                            # Resolve origin and destination to airport codes (lookups run concurrently)
+                            origin_airports, dest_airports = _resolve_route_airports(origin, destination)
                             
                             # Search flights from all origin airports to all destination airports
                             all_flights = []
@@ -4418,11 +4386,33 @@ def generate_mock_flight_data(route_info=None, user_message=""):
         "message": f"Here are great flight options from {route['departure']} to {route['destination']}! Check out the dashboard for detailed information, prices, and booking options."
     }
 
-def _is_iata_code(code: str) -> bool:
-    """Check if a string is likely an IATA code (3 letters)"""
-    if not code:
-        return False
-    return len(code) == 3 and code.isalpha() and code.isupper()
+def _lookup_airport_codes(keyword: str) -> List[str]:
+    """Resolve a city name to its airport IATA codes (IATA codes pass through unchanged)"""
+    if is_valid_iata(keyword):
+        return [keyword]
+    
+    logger.info(f"[MAIN] Converting '{keyword}' to IATA code(s)")
+    location_result = amadeus_service.get_airport_city_search(keyword=keyword)
+    if location_result and not location_result.get('error') and location_result.get('locations'):
+        airports = [loc for loc in location_result['locations'] if loc.get('type') == 'AIRPORT']
+        if airports:
+            airport_codes = [a.get('code') for a in airports if a.get('code')]
+            logger.info(f"[MAIN] Found {len(airport_codes)} airports for {keyword}: {airport_codes}")
+            return airport_codes
+        # No airports found, use first location
+        return [location_result['locations'][0].get('code', keyword)]
+    return []
+
+def _resolve_route_airports(origin: str, destination: str) -> Tuple[List[str], List[str]]:
+    """Resolve origin and destination airports, running both location lookups in parallel when needed"""
+    if is_valid_iata(origin) or is_valid_iata(destination):
+        # At most one network lookup, nothing to overlap
+        return _lookup_airport_codes(origin), _lookup_airport_codes(destination)
+    
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        origin_future = executor.submit(_lookup_airport_codes, origin)
+        dest_future = executor.submit(_lookup_airport_codes, destination)
+        return origin_future.result(), dest_future.result()
 
 # Vercel handles port configuration automatically
 
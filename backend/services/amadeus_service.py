@@ -2,16 +2,63 @@
 Amadeus API Service for travel data integration
 """
 import os
+import copy
+import functools
+import random
+import threading
+import time
 import httpx
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import logging
 import re
 from typing import Dict, List, Optional, Any, Tuple
-from datetime import datetime, timedelta
-import json
+from datetime import datetime
+from itertools import islice
+from urllib.parse import urlencode
+import orjson
+from cachetools import LRUCache, TTLCache
+
+from .iata_codes import is_valid_iata
 
 logger = logging.getLogger(__name__)
 
+# Response cache TTLs in seconds, per search type
+# 10 minutes by default since offers and prices move quickly; deployments that can
+# tolerate staler fares (or test runs replaying the same searches) can raise it
+FLIGHT_CACHE_TTL = int(os.getenv("AMADEUS_FLIGHT_CACHE_TTL", "600"))
+HOTEL_CACHE_TTL = 900         # 15 minutes
+INSPIRATION_CACHE_TTL = 3600  # 60 minutes - inspiration/cheapest dates are stable
+NEGATIVE_CACHE_TTL = 30       # 4xx failures, so repeated bad queries don't re-hit the API
+
+# City/airport keyword lookups are effectively static, so they are memoized
+# for the life of the process (LRU-bounded) instead of expiring
+LOCATION_CACHE_SIZE = 4096
+
+# Upper bound on Amadeus calls in flight at once across all threads; bursts past the
+# API's rate limit come back as 429s whose backoff ends up serializing the work anyway
+MAX_CONCURRENT_REQUESTS = int(os.getenv("AMADEUS_MAX_CONCURRENCY", "8"))
+
+
+def _extract_offer_fields(offer: Dict[str, Any]) -> Tuple[Any, Any, Any, List[Dict[str, Any]]]:
+    """Return (id, price total, currency, itineraries) for a flight offer"""
+    # Well-formed offers take the indexing fast path; only partial ones pay for .get() chains
+    try:
+        price = offer["price"]
+        return offer["id"], price["total"], price["currency"], offer["itineraries"]
+    except (KeyError, TypeError):
+        price = offer.get("price") or {}
+        return offer.get("id"), price.get("total"), price.get("currency"), offer.get("itineraries", [])
+
+
+class AmadeusAPIError(Exception):
+    """Non-2xx response from the Amadeus API"""
+    
+    def __init__(self, message: str, status_code: int):
+        super().__init__(message)
+        self.status_code = status_code
+
 
 class AmadeusService:
     """
@@ -31,44 +78,117 @@ class AmadeusService:
         
         logger.info(f"[AMADEUS] Initialized with base URL: {self.base_url}")
         
+        # The token request never changes for the life of the process, so encode it once
+        self._token_url = f"{self.base_url}/v1/security/oauth2/token"
+        self._token_body = urlencode({
+            "grant_type": "client_credentials",
+            "client_id": self.api_key,
+            "client_secret": self.api_secret
+        }).encode()
+        self._token_headers = {
+            "Content-Type": "application/x-www-form-urlencoded",
+            "Content-Length": str(len(self._token_body))
+        }
+        
         self._access_token = None
-        self._token_expires_at = None
+        self._token_expires_at = 0.0  # time.monotonic() deadline, immune to wall-clock adjustments
+        # Single-flight guard so concurrent requests trigger only one token refresh
+        self._token_lock = threading.Lock()
+        # Number of 401-triggered token refreshes, for spotting credential/clock problems
+        self.auth_retries_total = 0
         self._client = None  # Initialize lazily to avoid event loop issues
+        
+        # Persistent HTTP session so Amadeus calls reuse pooled keep-alive connections
+        # instead of paying a TCP+TLS handshake per request
+        self._session = requests.Session()
+        retries = Retry(
+            total=3,
+            backoff_factor=0.3,
+            status_forcelist=[429, 500, 502, 503, 504],
+            raise_on_status=False  # Hand the final response back so raise_for_status() reports it
+        )
+        adapter = HTTPAdapter(pool_connections=10, pool_maxsize=50, max_retries=retries)
+        self._session.mount("https://", adapter)
+        self._session.mount("http://", adapter)
+        
+        # Short-lived response caches keyed on normalized search parameters
+        self._response_caches = {
+            "flights": TTLCache(maxsize=256, ttl=FLIGHT_CACHE_TTL),
+            "hotels": TTLCache(maxsize=256, ttl=HOTEL_CACHE_TTL),
+            "locations": LRUCache(maxsize=LOCATION_CACHE_SIZE),
+            "inspiration": TTLCache(maxsize=128, ttl=INSPIRATION_CACHE_TTL),
+            "cheapest_dates": TTLCache(maxsize=128, ttl=INSPIRATION_CACHE_TTL),
+        }
+        # Client-error results keyed on (cache name, cache key), kept only briefly
+        self._negative_cache = TTLCache(maxsize=512, ttl=NEGATIVE_CACHE_TTL)
+        self._cache_lock = threading.RLock()
+        self._request_slots = threading.BoundedSemaphore(MAX_CONCURRENT_REQUESTS)
+    
+    def _get_cached(self, cache_name: str, key: Tuple) -> Optional[Dict[str, Any]]:
+        """Return a copy of a cached response, or None on miss"""
+        with self._cache_lock:
+            cached = self._response_caches[cache_name].get(key)
+            if cached is None:
+                cached = self._negative_cache.get((cache_name, key))
+        if cached is None:
+            return None
+        logger.info(f"[AMADEUS] Cache hit: {cache_name} {key}")
+        # Callers annotate returned results in place, so never hand out the cached object
+        return copy.deepcopy(cached)
+    
+    def _set_cached(self, cache_name: str, key: Tuple, result: Dict[str, Any]) -> None:
+        """Cache a successful response; error results are never cached"""
+        if result.get("error"):
+            return
+        with self._cache_lock:
+            self._response_caches[cache_name][key] = copy.deepcopy(result)
+    
+    def _set_negative_cached(self, cache_name: str, key: Tuple, error: Exception, result: Dict[str, Any]) -> None:
+        """Briefly cache the result of a 4xx failure; 401s and server/network errors are retried"""
+        status_code = getattr(error, "status_code", None)
+        if status_code is None or not 400 <= status_code < 500 or status_code == 401:
+            return
+        with self._cache_lock:
+            self._negative_cache[(cache_name, key)] = copy.deepcopy(result)
     
     def _get_access_token(self) -> str:
         """Get or refresh OAuth2 access token"""
-        if self._access_token and self._token_expires_at and datetime.now() < self._token_expires_at:
-            return self._access_token
-        
-        try:
-            response = requests.post(
-                f"{self.base_url}/v1/security/oauth2/token",
-                headers={"Content-Type": "application/x-www-form-urlencoded"},
-                data={
-                    "grant_type": "client_credentials",
-                    "client_id": self.api_key,
-                    "client_secret": self.api_secret
-                },
-                timeout=30
-            )
-            response.raise_for_status()
-            
-            token_data = response.json()
-            self._access_token = token_data["access_token"]
-            # Set expiration 5 minutes before actual expiry for safety
-            expires_in = token_data.get("expires_in", 1800) - 300
-            self._token_expires_at = datetime.now() + timedelta(seconds=expires_in)
+        # Fast path: no locking while the cached token is still valid
+        token = self._access_token
+        if token and time.monotonic() < self._token_expires_at:
+            return token
+        
+        with self._token_lock:
+            # Another thread may have refreshed the token while we waited for the lock
+            token = self._access_token
+            if token and time.monotonic() < self._token_expires_at:
+                return token
             
-            logger.info("Amadeus access token refreshed successfully")
-            return self._access_token
-            
-        except Exception as e:
-            logger.error(f"Failed to get Amadeus access token: {e}")
-            raise Exception(f"Amadeus authentication failed: {e}")
+            try:
+                response = self._session.post(
+                    self._token_url,
+                    headers=self._token_headers,
+                    data=self._token_body,
+                    timeout=30
+                )
+                response.raise_for_status()
+                
+                token_data = orjson.loads(response.content)
+                self._access_token = token_data["access_token"]
+                # Expire 5-6 minutes early for safety; the jitter keeps separate
+                # worker processes from all refreshing at the same moment
+                expires_in = token_data.get("expires_in", 1800) - random.randint(300, 360)
+                self._token_expires_at = time.monotonic() + expires_in
+                
+                logger.info("Amadeus access token refreshed successfully")
+                return self._access_token
+                
+            except Exception as e:
+                logger.error(f"Failed to get Amadeus access token: {e}")
+                raise Exception(f"Amadeus authentication failed: {e}")
     
     def _make_request(self, endpoint: str, params: Dict[str, Any] = None) -> Dict[str, Any]:
         """Make authenticated request to Amadeus API"""
-        token = self._get_access_token()
         params = params or {}
         
         # Log request details for debugging
@@ -77,38 +197,51 @@ class AmadeusService:
         logger.info(f"[AMADEUS] Request params: {params}")
         
         try:
-            response = requests.get(
-                full_url,
-                headers={"Authorization": f"Bearer {token}"},
-                params=params,
-                timeout=30
-            )
+            # A 401 means the cached token went stale: refresh it and retry once, no more
+            for attempt in range(2):
+                token = self._get_access_token()
+                with self._request_slots:
+                    response = self._session.get(
+                        full_url,
+                        headers={"Authorization": f"Bearer {token}"},
+                        params=params,
+                        timeout=30
+                    )
+                
+                # Log response status before raising
+                logger.info(f"[AMADEUS] Response status: {response.status_code}")
+                logger.debug("[AMADEUS] Response encoding: %s, %d bytes decoded", response.headers.get('Content-Encoding', 'identity'), len(response.content))
+                if response.status_code != 401 or attempt == 1:
+                    break
+                
+                self.auth_retries_total += 1
+                logger.warning(f"[AMADEUS] Access token rejected, refreshing and retrying (auth retries total: {self.auth_retries_total})")
+                self._access_token = None
             
-            # Log response status before raising
-            logger.info(f"[AMADEUS] Response status: {response.status_code}")
             if response.status_code != 200:
                 logger.warning(f"[AMADEUS] Non-200 response: {response.text[:500]}")
             
             response.raise_for_status()
-            result = response.json()
+            result = orjson.loads(response.content)
             logger.info(f"[AMADEUS] Response received, data keys: {list(result.keys()) if isinstance(result, dict) else 'not a dict'}")
             return result
             
         except requests.exceptions.HTTPError as e:
             logger.error(f"[AMADEUS] API error {e.response.status_code}: {e.response.text}")
-            if e.response.status_code == 401:
-                # Token might be expired, try to refresh
-                self._access_token = None
-                return self._make_request(endpoint, params)
             # include body to help diagnose
-            raise Exception(f"Amadeus API error: {e.response.status_code} - {e.response.text}")
+            raise AmadeusAPIError(f"Amadeus API error: {e.response.status_code} - {e.response.text}", e.response.status_code)
         except Exception as e:
             logger.error(f"[AMADEUS] API request failed: {e}", exc_info=True)
             raise Exception(f"Amadeus API request failed: {e}")
     
     def search_flights(self, origin: str, destination: str, departure_date: str, 
-                           return_date: str = None, adults: int = 1, max_price: int = None) -> Dict[str, Any]:
-        """Search for flight offers"""
+                           return_date: str = None, adults: int = 1, max_price: int = None,
+                           max_results: int = None) -> Dict[str, Any]:
+        """Search for flight offers (max_results caps the offers Amadeus returns, up to 250)"""
+        if not (is_valid_iata(origin) and is_valid_iata(destination)):
+            logger.warning(f"[AMADEUS] Rejecting flight search with invalid IATA codes: {origin!r} -> {destination!r}")
+            return {"error": f"Invalid IATA code: {origin!r} -> {destination!r}", "flights": []}
+        
         params = {
             "originLocationCode": origin,
             "destinationLocationCode": destination,
@@ -122,12 +255,26 @@ class AmadeusService:
         if max_price:
             params["maxPrice"] = max_price
         
+        # Capping server-side keeps unneeded offers off the wire and out of the parsed response
+        if max_results:
+            params["max"] = max_results
+        
+        # origin/destination already passed the uppercase IATA check, so they key the cache as-is
+        cache_key = (origin, destination, departure_date, return_date or "", adults, max_price or "", max_results or "")
+        cached = self._get_cached("flights", cache_key)
+        if cached is not None:
+            return cached
+        
         try:
             response = self._make_request("/v2/shopping/flight-offers", params)
-            return self._format_flight_response(response)
+            result = self._format_flight_response(response, max_results or None)
+            self._set_cached("flights", cache_key, result)
+            return result
         except Exception as e:
             logger.error(f"Flight search failed: {e}")
-            return {"error": str(e), "flights": []}
+            result = {"error": str(e), "flights": []}
+            self._set_negative_cached("flights", cache_key, e, result)
+            return result
     
     def get_flight_inspiration(self, origin: str, max_price: int = None, 
                                     departure_date: str = None) -> Dict[str, Any]:
@@ -139,12 +286,21 @@ class AmadeusService:
         if departure_date:
             params["departureDate"] = departure_date
         
+        cache_key = (origin.upper(), max_price or "", departure_date or "")
+        cached = self._get_cached("inspiration", cache_key)
+        if cached is not None:
+            return cached
+        
         try:
             response = self._make_request("/v1/shopping/flight-destinations", params)
-            return self._format_inspiration_response(response)
+            result = self._format_inspiration_response(response)
+            self._set_cached("inspiration", cache_key, result)
+            return result
         except Exception as e:
             logger.error(f"Flight inspiration failed: {e}")
-            return {"error": str(e), "destinations": []}
+            result = {"error": str(e), "destinations": []}
+            self._set_negative_cached("inspiration", cache_key, e, result)
+            return result
     
     def search_hotels(self, city_code: str, check_in: str, check_out: str, 
                            adults: int = 1, radius: int = 50, price_range: str = None) -> Dict[str, Any]:
@@ -153,6 +309,10 @@ class AmadeusService:
         Returns actual bookable prices (not estimates) from Amadeus Hotel Offers API
         Uses v2 API for city-based search
         """
+        if not is_valid_iata(city_code):
+            logger.warning(f"[AMADEUS] Rejecting hotel search with invalid IATA city code: {city_code!r}")
+            return {"error": f"Invalid IATA city code: {city_code!r}", "hotels": []}
+        
         params = {
             "cityCode": city_code,
             "checkInDate": check_in,
@@ -166,11 +326,17 @@ class AmadeusService:
         
         logger.info(f"[AMADEUS] Searching hotels with params: cityCode={city_code}, checkIn={check_in}, checkOut={check_out}, adults={adults}")
         
+        cache_key = (city_code.upper(), check_in, check_out, adults, radius, price_range or "")
+        cached = self._get_cached("hotels", cache_key)
+        if cached is not None:
+            return cached
+        
         try:
             response = self._make_request("/v2/shopping/hotel-offers", params)
             logger.info(f"[AMADEUS] Hotel API response received, formatting...")
             formatted = self._format_hotel_response(response)
             logger.info(f"[AMADEUS] Formatted hotel response: {len(formatted.get('hotels', []))} hotels found, error: {formatted.get('error')}")
+            self._set_cached("hotels", cache_key, formatted)
             return formatted
         except Exception as e:
             error_str = str(e)
@@ -179,9 +345,12 @@ class AmadeusService:
                 logger.warning(f"[AMADEUS] Hotel search returned 404 - no hotels found for cityCode={city_code}, dates={check_in} to {check_out}. This might be normal if no hotels are available for this date range.")
                 # Try alternative search using coordinates if we have city name
                 # For now, return empty result instead of error
-                return {"hotels": [], "count": 0, "error": None}
-            logger.error(f"[AMADEUS] Hotel search failed: {e}", exc_info=True)
-            return {"error": str(e), "hotels": []}
+                result = {"hotels": [], "count": 0, "error": None}
+            else:
+                logger.error(f"[AMADEUS] Hotel search failed: {e}", exc_info=True)
+                result = {"error": str(e), "hotels": []}
+            self._set_negative_cached("hotels", cache_key, e, result)
+            return result
     
     def search_hotels_v3(self, hotel_ids: List[str], check_in: str, check_out: str,
                          adults: int = 1, room_quantity: int = 1, currency: str = None,
@@ -263,9 +432,10 @@ class AmadeusService:
             query_string = "&".join(query_params)
             full_url = f"{self.base_url}/v3/shopping/hotel-offers?{query_string}"
             
-            response = requests.get(full_url, headers=headers, timeout=30)
+            with self._request_slots:
+                response = self._session.get(full_url, headers=headers, timeout=30)
             response.raise_for_status()
-            result = response.json()
+            result = orjson.loads(response.content)
             
             logger.info(f"[AMADEUS] Hotel v3 API response received, formatting...")
             formatted = self._format_hotel_v3_response(result)
@@ -307,9 +477,10 @@ class AmadeusService:
             if query_string:
                 full_url += f"?{query_string}"
             
-            response = requests.get(full_url, headers=headers, timeout=30)
+            with self._request_slots:
+                response = self._session.get(full_url, headers=headers, timeout=30)
             response.raise_for_status()
-            result = response.json()
+            result = orjson.loads(response.content)
             
             logger.info(f"[AMADEUS] Hotel offer pricing received for offerId={offer_id}")
             formatted = self._format_hotel_offer_pricing_response(result)
@@ -387,12 +558,21 @@ class AmadeusService:
         """Search for airports and cities"""
         params = {"keyword": keyword, "subType": "AIRPORT,CITY"}
         
+        cache_key = (keyword.strip().lower(),)
+        cached = self._get_cached("locations", cache_key)
+        if cached is not None:
+            return cached
+        
         try:
             response = self._make_request("/v1/reference-data/locations", params)
-            return self._format_location_response(response)
+            result = self._format_location_response(response)
+            self._set_cached("locations", cache_key, result)
+            return result
         except Exception as e:
             logger.error(f"Location search failed: {e}")
-            return {"error": str(e), "locations": []}
+            result = {"error": str(e), "locations": []}
+            self._set_negative_cached("locations", cache_key, e, result)
+            return result
     
     def get_city_coordinates(self, city_name: str) -> Optional[Tuple[float, float]]:
         """
@@ -433,9 +613,8 @@ class AmadeusService:
             
             # Fallback to external geocoding service if Amadeus didn't provide usable coordinates
             try:
-                import requests
                 logger.info(f"[GEOCODE] Using OpenStreetMap fallback for {city_name}")
-                geo_response = requests.get(
+                geo_response = self._session.get(
                     "https://nominatim.openstreetmap.org/search",
                     params={
                         "q": city_name,
@@ -447,7 +626,7 @@ class AmadeusService:
                 )
                 
                 if geo_response.ok:
-                    geo_data = geo_response.json()
+                    geo_data = orjson.loads(geo_response.content)
                     if geo_data and len(geo_data) > 0:
                         lat = float(geo_data[0]["lat"])
                         lon = float(geo_data[0]["lon"])
@@ -476,12 +655,21 @@ class AmadeusService:
             "departureDate": departure_date_range
         }
         
+        cache_key = (origin.upper(), destination.upper(), departure_date_range)
+        cached = self._get_cached("cheapest_dates", cache_key)
+        if cached is not None:
+            return cached
+        
         try:
             response = self._make_request("/v1/shopping/flight-dates", params)
-            return self._format_cheapest_dates_response(response)
+            result = self._format_cheapest_dates_response(response)
+            self._set_cached("cheapest_dates", cache_key, result)
+            return result
         except Exception as e:
             logger.error(f"Cheapest dates search failed: {e}")
-            return {"error": str(e), "dates": []}
+            result = {"error": str(e), "dates": []}
+            self._set_negative_cached("cheapest_dates", cache_key, e, result)
+            return result
 
     def get_flight_price_analysis(self, origin: str, destination: str, 
                                        departure_date: str, return_date: str = None) -> Dict[str, Any]:
@@ -590,8 +778,8 @@ class AmadeusService:
             logger.error(f"Branded fares search failed: {e}")
             return {"error": str(e), "fares": []}
     
-    def _format_flight_response(self, response: Dict[str, Any]) -> Dict[str, Any]:
-        """Format flight search response"""
+    def _format_flight_response(self, response: Dict[str, Any], max_items: Optional[int] = None) -> Dict[str, Any]:
+        """Format flight search response (only the first max_items offers when given)"""
         logger.info(f"[AMADEUS] Raw API response received: {len(response.get('data', []))} offers")
         
         # Validate response structure
@@ -602,7 +790,9 @@ class AmadeusService:
         # Log first offer structure for debugging
         if response.get("data"):
             first_offer = response["data"][0]
-            logger.info(f"[AMADEUS] First offer structure: {json.dumps(first_offer, indent=2, default=str)}")
+            # Pretty-printing a full offer is expensive, only do it when debug logging is on
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f"[AMADEUS] First offer structure: {orjson.dumps(first_offer, option=orjson.OPT_INDENT_2, default=str).decode()}")
             
             # Validate required fields
             if not first_offer.get("price", {}).get("total"):
@@ -610,54 +800,9 @@ class AmadeusService:
             if not first_offer.get("itineraries"):
                 logger.warning("[AMADEUS] Missing itineraries in first offer")
         
-        flights = []
-        for i, offer in enumerate(response.get("data", [])):
-            price_obj = offer.get('price', {})
-            price_total = price_obj.get('total')
-            price_currency = price_obj.get('currency')
-            logger.info(f"[AMADEUS] Processing offer {i+1}: ID={offer.get('id')}, Price={price_total} {price_currency}")
-            logger.info(f"[AMADEUS] CURRENCY CHECK: Offer {i+1} - Original currency from API: {price_currency}")
-            
-            flight_info = {
-                "id": offer.get("id"),
-                "price": price_total,
-                "currency": price_currency,
-                "itineraries": []
-            }
-            
-            for j, itinerary in enumerate(offer.get("itineraries", [])):
-                logger.info(f"[AMADEUS] Processing itinerary {j+1}: Duration={itinerary.get('duration')}, Segments={len(itinerary.get('segments', []))}")
-                
-                segments = []
-                for k, segment in enumerate(itinerary.get("segments", [])):
-                    # Extract flight number and carrier code correctly
-                    carrier_code = segment.get("carrierCode", "")
-                    flight_number = segment.get("number", "")
-                    
-                    segment_info = {
-                        "departure": {
-                            "airport": segment.get("departure", {}).get("iataCode"),
-                            "time": segment.get("departure", {}).get("at")
-                        },
-                        "arrival": {
-                            "airport": segment.get("arrival", {}).get("iataCode"),
-                            "time": segment.get("arrival", {}).get("at")
-                        },
-                        "airline": carrier_code,
-                        "flight_number": flight_number,
-                        "duration": segment.get("duration")
-                    }
-                    
-                    logger.info(f"[AMADEUS] Segment {k+1}: {segment_info['departure']['airport']} {segment_info['departure']['time']} -> {segment_info['arrival']['airport']} {segment_info['arrival']['time']} ({carrier_code} {flight_number})")
-                    segments.append(segment_info)
-                
-                flight_info["itineraries"].append({
-                    "duration": itinerary.get("duration"),
-                    "segments": segments
-                })
-            
-            flights.append(flight_info)
-            logger.info(f"[AMADEUS] Formatted flight {i+1}: Price={flight_info['price']} {flight_info['currency']}, Itineraries={len(flight_info['itineraries'])}")
+        # Per-offer/segment detail is debug-only; this runs for every segment of every offer
+        debug = logger.isEnabledFor(logging.DEBUG)
+        flights = [self._format_flight_offer(offer, debug) for offer in islice(response.get("data", []), max_items)]
         
         # Log currency summary
         currencies = [f.get('currency') for f in flights if f.get('currency')]
@@ -666,9 +811,77 @@ class AmadeusService:
             logger.info(f"[AMADEUS] CURRENCY SUMMARY: Found {len(unique_currencies)} unique currency(ies): {unique_currencies}")
         
         result = {"flights": flights, "count": len(flights)}
-        logger.info(f"[AMADEUS] Final formatted result: {len(flights)} flights")
+        logger.info(f"[AMADEUS] Formatted {len(flights)} flights")
         return result
     
+    def _format_flight_offer(self, offer: Dict[str, Any], debug: bool = False) -> Dict[str, Any]:
+        """Format a single flight offer; offers are independent of each other"""
+        offer_id, price_total, price_currency, itineraries = _extract_offer_fields(offer)
+        if debug:
+            logger.debug(f"[AMADEUS] Processing offer ID={offer_id}, Price={price_total} {price_currency} (currency from API)")
+        
+        flight_info = {
+            "id": offer_id,
+            "price": price_total,
+            "currency": price_currency,
+            "itineraries": []
+        }
+        
+        for itinerary in itineraries:
+            segments = []
+            for segment in itinerary.get("segments", []):
+                segment_info = self._format_flight_segment(segment)
+                if debug:
+                    logger.debug(f"[AMADEUS] Segment: {segment_info['departure']['airport']} {segment_info['departure']['time']} -> {segment_info['arrival']['airport']} {segment_info['arrival']['time']} ({segment_info['airline']} {segment_info['flight_number']})")
+                segments.append(segment_info)
+            
+            flight_info["itineraries"].append({
+                "duration": itinerary.get("duration"),
+                "segments": segments
+            })
+        
+        return flight_info
+    
+    def _format_flight_segment(self, segment: Dict[str, Any]) -> Dict[str, Any]:
+        """Flatten one Amadeus segment into the slim shape used by the flight formatters"""
+        # Fast path: well-formed segments are read with plain indexing under a single try
+        try:
+            departure = segment["departure"]
+            arrival = segment["arrival"]
+            return {
+                "departure": {
+                    "airport": departure["iataCode"],
+                    "time": departure["at"]
+                },
+                "arrival": {
+                    "airport": arrival["iataCode"],
+                    "time": arrival["at"]
+                },
+                "airline": segment["carrierCode"],
+                "flight_number": segment["number"],
+                "duration": segment.get("duration")
+            }
+        except (KeyError, TypeError):
+            pass
+        
+        # Look each nested object up once; `or {}` only allocates when the key is missing
+        departure = segment.get("departure") or {}
+        arrival = segment.get("arrival") or {}
+        return {
+            "departure": {
+                "airport": departure.get("iataCode"),
+                "time": departure.get("at")
+            },
+            "arrival": {
+                "airport": arrival.get("iataCode"),
+                "time": arrival.get("at")
+            },
+            # Extract flight number and carrier code correctly
+            "airline": segment.get("carrierCode", ""),
+            "flight_number": segment.get("number", ""),
+            "duration": segment.get("duration")
+        }
+    
     def _format_inspiration_response(self, response: Dict[str, Any]) -> Dict[str, Any]:
         """Format flight inspiration response"""
         destinations = []
@@ -1492,17 +1705,17 @@ class AmadeusService:
         
         try:
             token = self._get_access_token()
-            response = requests.post(
+            response = self._session.post(
                 f"{self.base_url}/v1/booking/flight-orders",
                 headers={
                     "Authorization": f"Bearer {token}",
                     "Content-Type": "application/json"
                 },
-                json=payload,
+                data=orjson.dumps(payload),
                 timeout=30
             )
             response.raise_for_status()
-            result = response.json()
+            result = orjson.loads(response.content)
             return self._format_flight_order_response(result)
         except Exception as e:
             logger.error(f"Flight order creation failed: {e}")
@@ -1556,17 +1769,17 @@ class AmadeusService:
         
         try:
             token = self._get_access_token()
-            response = requests.post(
+            response = self._session.post(
                 f"{self.base_url}/v1/shopping/flight-offers/pricing",
                 headers={
                     "Authorization": f"Bearer {token}",
                     "Content-Type": "application/json"
                 },
-                json=payload,
+                data=orjson.dumps(payload),
                 timeout=30
             )
             response.raise_for_status()
-            result = response.json()
+            result = orjson.loads(response.content)
             return self._format_flight_price_response(result)
         except Exception as e:
             logger.error(f"Flight offers price failed: {e}")
@@ -1591,7 +1804,7 @@ class AmadeusService:
         """
         try:
             token = self._get_access_token()
-            response = requests.delete(
+            response = self._session.delete(
                 f"{self.base_url}/v1/booking/flight-orders/{order_id}",
                 headers={"Authorization": f"Bearer {token}"},
                 timeout=30
@@ -1687,17 +1900,17 @@ class AmadeusService:
         
         try:
             token = self._get_access_token()
-            response = requests.post(
+            response = self._session.post(
                 f"{self.base_url}/v3/booking/hotel-bookings",
                 headers={
                     "Authorization": f"Bearer {token}",
                     "Content-Type": "application/json"
                 },
-                json=payload,
+                data=orjson.dumps(payload),
                 timeout=30
             )
             response.raise_for_status()
-            result = response.json()
+            result = orjson.loads(response.content)
             return self._format_hotel_booking_response(result)
         except Exception as e:
             logger.error(f"Hotel booking failed: {e}")
@@ -1745,17 +1958,17 @@ class AmadeusService:
         
         try:
             token = self._get_access_token()
-            response = requests.post(
+            response = self._session.post(
                 f"{self.base_url}/v1/booking/transfer-bookings",
                 headers={
                     "Authorization": f"Bearer {token}",
                     "Content-Type": "application/json"
                 },
-                json=payload,
+                data=orjson.dumps(payload),
                 timeout=30
             )
             response.raise_for_status()
-            result = response.json()
+            result = orjson.loads(response.content)
             return self._format_transfer_booking_response(result)
         except Exception as e:
             logger.error(f"Transfer booking failed: {e}")
@@ -1780,7 +1993,7 @@ class AmadeusService:
         """
         try:
             token = self._get_access_token()
-            response = requests.delete(
+            response = self._session.delete(
                 f"{self.base_url}/v1/booking/transfer-bookings/{booking_id}",
                 headers={"Authorization": f"Bearer {token}"},
                 timeout=30
@@ -1840,17 +2053,17 @@ class AmadeusService:
         
         try:
             token = self._get_access_token()
-            response = requests.post(
+            response = self._session.post(
                 f"{self.base_url}/v3/travel/trip-parser",
                 headers={
                     "Authorization": f"Bearer {token}",
                     "Content-Type": "application/json"
                 },
-                json=payload,
+                data=orjson.dumps(payload),
                 timeout=30
             )
             response.raise_for_status()
-            result = response.json()
+            result = orjson.loads(response.content)
             return self._format_trip_parser_response(result)
         except Exception as e:
             logger.error(f"Trip parser failed: {e}")
@@ -2238,6 +2451,13 @@ class AmadeusService:
             return "LOW"
     
     def close(self):
-        """Close HTTP client"""
+        """Close HTTP clients"""
         if self._client:
             self._client.close()
+        self._session.close()
+
+
+@functools.lru_cache(maxsize=1)
+def get_amadeus_service() -> AmadeusService:
+    """Process-wide AmadeusService, so the OAuth token and connection pool are shared"""
+    return AmadeusService()
@@ -1,9 +1,11 @@
 """
 Cache Manager for session-based caching of API responses
 """
+import hashlib
 import time
 import threading
-from typing import Any, Optional
+from typing import Any, Optional, Tuple
+import orjson
 from cachetools import TTLCache
 
 
@@ -17,12 +19,12 @@ class CacheManager:
         self._cache = TTLCache(maxsize=1000, ttl=default_ttl)
         self._lock = threading.RLock()
     
-    def _generate_key(self, session_id: str, api_type: str, params: dict) -> str:
+    def _generate_key(self, session_id: str, api_type: str, params: dict) -> Tuple[str, str, bytes]:
         """Generate cache key from session, API type, and parameters"""
-        # Sort params for consistent key generation
-        sorted_params = sorted(params.items()) if params else []
-        param_str = "|".join(f"{k}={v}" for k, v in sorted_params)
-        return f"{session_id}:{api_type}:{param_str}"
+        # Sorted-key serialization keeps the digest independent of param order;
+        # the session stays a separate tuple field so clear_session can match it exactly
+        param_bytes = orjson.dumps(params or {}, option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS, default=str)
+        return (session_id, api_type, hashlib.blake2b(param_bytes, digest_size=16).digest())
     
     def get(self, session_id: str, api_type: str, params: dict) -> Optional[Any]:
         """Get cached response if available"""
@@ -47,7 +49,7 @@ class CacheManager:
     def clear_session(self, session_id: str) -> None:
         """Clear all cached data for a session"""
         with self._lock:
-            keys_to_remove = [key for key in self._cache.keys() if key.startswith(f"{session_id}:")]
+            keys_to_remove = [key for key in self._cache.keys() if key[0] == session_id]
             for key in keys_to_remove:
                 self._cache.pop(key, None)
     
@@ -3,12 +3,37 @@ Flight Response Formatter for Smart Travel Assistant
 Formats Amadeus API responses for frontend dashboard display
 """
 
-from typing import Dict, List, Any, Optional
-from datetime import datetime
+from functools import lru_cache
+from itertools import islice
+from operator import itemgetter
+from typing import Dict, List, Any, Mapping, Optional
+from datetime import date, datetime, timedelta
 import logging
+import re
+from types import MappingProxyType
+from urllib.parse import quote_plus
 
 logger = logging.getLogger(__name__)
 
+# ISO-8601 durations as sent by Amadeus (PT3H30M), and the "8h 30m" display form
+_ISO_DURATION_MATCH = re.compile(r'PT(?:(\d+)H)?(?:(\d+)M)?').match
+_DURATION_HOURS_MATCH = re.compile(r'(?:PT)?(?:(\d+)H)?(?:(\d+)M)?').match
+
+_price_key = itemgetter("price")
+
+# Shared read-only stand-in for missing nested objects, so lookups never allocate a fresh {}
+_EMPTY: Mapping[str, Any] = MappingProxyType({})
+
+_MONTH_ABBR = ("Jan", "Feb", "Mar", "Apr", "May", "Jun",
+               "Jul", "Aug", "Sep", "Oct", "Nov", "Dec")
+
+# (day offset from departure, simulated price multiplier) for the 7-day price trend chart:
+# days before departure run 5%/day higher, days after 3%/day higher
+_PRICE_TREND_MULTIPLIERS = tuple(
+    (offset, 1 + abs(offset) * 0.05 if offset < 0 else 1 + offset * 0.03 if offset > 0 else 1)
+    for offset in range(-3, 4)
+)
+
 def format_flight_for_dashboard(
     flight_data: Dict[str, Any],
     origin_city: str,
@@ -51,71 +76,94 @@ def format_flight_for_dashboard(
         "priceData": []
     }
     
+    flights_list = flight_data.get("flights")
+    if not flights_list:
+        # Nothing to score, sort, mark or filter; the chart still falls back to its default base price
+        formatted_response["priceData"] = _generate_price_trend_data([], departure_date)
+        logger.info("[FLIGHT_FORMATTER] No flights to format")
+        return formatted_response
+    
+    # Per-flight log lines are only built when INFO logging is actually on
+    info = logger.isEnabledFor(logging.INFO)
+    
     # Process flight offers
     all_prices = []
     seen_outbound_keys = set()  # Set for duplicate check (outbound flights)
     seen_return_keys = set()    # Set for duplicate check (return flights)
+    add_outbound = formatted_response["outboundFlights"].append
+    add_return = formatted_response["returnFlights"].append
     
-    if "flights" in flight_data and flight_data["flights"]:
-        for flight in flight_data["flights"]:
-            try:
-                price = float(flight.get("price", 0))
-                original_currency = flight.get("currency", "UNKNOWN")
-                logger.info(f"[FLIGHT_FORMATTER] CURRENCY CHECK: Original currency from Amadeus: {original_currency}, Price: {price}")
-                all_prices.append(price)
-                
-                # Process itineraries
-                itineraries = flight.get("itineraries", [])
-                
-                # Outbound flight (first itinerary)
-                if len(itineraries) > 0:
-                    outbound_flight = _format_single_flight(
-                        flight, itineraries[0], 0, price
+    for flight in flights_list:
+        # Only a malformed price is expected here; anything else in the try below
+        # is a formatting bug and still goes through the generic handler
+        try:
+            price = float(flight.get("price", 0))
+        except (TypeError, ValueError):
+            logger.error("Error formatting flight: invalid price %r", flight.get("price"))
+            continue
+        
+        try:
+            original_currency = flight.get("currency", "UNKNOWN")
+            if info:
+                logger.info("[FLIGHT_FORMATTER] CURRENCY CHECK: Original currency from Amadeus: %s, Price: %s", original_currency, price)
+            all_prices.append(price)
+            
+            # Process itineraries
+            itineraries = flight.get("itineraries", [])
+            
+            # Outbound flight (first itinerary)
+            if len(itineraries) > 0:
+                outbound_flight = _format_single_flight(
+                    flight, itineraries[0], 0, price
+                )
+                if outbound_flight:
+                    # Generate unique key to identify flight
+                    # Combination of airline + flightNumber + departure time + arrival time
+                    outbound_key = (
+                        outbound_flight.get('airline', ''),
+                        outbound_flight.get('flightNumber', ''),
+                        outbound_flight.get('departure', ''),
+                        outbound_flight.get('arrival', ''),
+                        outbound_flight.get('duration', '')
                     )
-                    if outbound_flight:
-                        # Generate unique key to identify flight
-                        # Combination of airline + flightNumber + departure time + arrival time
-                        outbound_key = (
-                            outbound_flight.get('airline', ''),
-                            outbound_flight.get('flightNumber', ''),
-                            outbound_flight.get('departure', ''),
-                            outbound_flight.get('arrival', ''),
-                            outbound_flight.get('duration', '')
-                        )
-                        
-                        # Duplicate check: add only if not already added
-                        if outbound_key not in seen_outbound_keys:
-                            seen_outbound_keys.add(outbound_key)
-                            formatted_response["outboundFlights"].append(outbound_flight)
-                            logger.info(f"[FLIGHT_FORMATTER] Added unique outbound flight: {outbound_flight.get('airline', '')} {outbound_flight.get('flightNumber', '')}")
-                        else:
-                            logger.info(f"[FLIGHT_FORMATTER] Skipped duplicate outbound flight: {outbound_flight.get('airline', '')} {outbound_flight.get('flightNumber', '')}")
-                
-                # Return flight (second itinerary if exists)
-                if len(itineraries) > 1 and return_date:
-                    return_flight = _format_single_flight(
-                        flight, itineraries[1], 1, price
+                    
+                    # Duplicate check: add only if not already added
+                    if outbound_key not in seen_outbound_keys:
+                        seen_outbound_keys.add(outbound_key)
+                        add_outbound(outbound_flight)
+                        if info:
+                            logger.info("[FLIGHT_FORMATTER] Added unique outbound flight: %s %s", outbound_flight.get('airline', ''), outbound_flight.get('flightNumber', ''))
+                    else:
+                        if info:
+                            logger.info("[FLIGHT_FORMATTER] Skipped duplicate outbound flight: %s %s", outbound_flight.get('airline', ''), outbound_flight.get('flightNumber', ''))
+            
+            # Return flight (second itinerary if exists)
+            if len(itineraries) > 1 and return_date:
+                return_flight = _format_single_flight(
+                    flight, itineraries[1], 1, price
+                )
+                if return_flight:
+                    # Return flights: same duplicate check
+                    return_key = (
+                        return_flight.get('airline', ''),
+                        return_flight.get('flightNumber', ''),
+                        return_flight.get('departure', ''),
+                        return_flight.get('arrival', ''),
+                        return_flight.get('duration', '')
                     )
-                    if return_flight:
-                        # Return flights: same duplicate check
-                        return_key = (
-                            return_flight.get('airline', ''),
-                            return_flight.get('flightNumber', ''),
-                            return_flight.get('departure', ''),
-                            return_flight.get('arrival', ''),
-                            return_flight.get('duration', '')
-                        )
-                        
-                        if return_key not in seen_return_keys:
-                            seen_return_keys.add(return_key)
-                            formatted_response["returnFlights"].append(return_flight)
-                            logger.info(f"[FLIGHT_FORMATTER] Added unique return flight: {return_flight.get('airline', '')} {return_flight.get('flightNumber', '')}")
-                        else:
-                            logger.info(f"[FLIGHT_FORMATTER] Skipped duplicate return flight: {return_flight.get('airline', '')} {return_flight.get('flightNumber', '')}")
-                        
-            except Exception as e:
-                logger.error(f"Error formatting flight: {e}")
-                continue
+                    
+                    if return_key not in seen_return_keys:
+                        seen_return_keys.add(return_key)
+                        add_return(return_flight)
+                        if info:
+                            logger.info("[FLIGHT_FORMATTER] Added unique return flight: %s %s", return_flight.get('airline', ''), return_flight.get('flightNumber', ''))
+                    else:
+                        if info:
+                            logger.info("[FLIGHT_FORMATTER] Skipped duplicate return flight: %s %s", return_flight.get('airline', ''), return_flight.get('flightNumber', ''))
+                    
+        except Exception as e:
+            logger.error("Error formatting flight: %s", e)
+            continue
     
     # Generate price trend data
     formatted_response["priceData"] = _generate_price_trend_data(
@@ -124,42 +172,35 @@ def format_flight_for_dashboard(
     
     # Sort flights based on user preferences or by price
     if user_preferences and (formatted_response["outboundFlights"] or formatted_response["returnFlights"]):
-        logger.info(f"[FLIGHT_FORMATTER] Sorting flights by user preferences: {user_preferences}")
-        logger.info(f"[FLIGHT_FORMATTER] Preferences type: {type(user_preferences)}, values: budget={user_preferences.get('budget')}, quality={user_preferences.get('quality')}, convenience={user_preferences.get('convenience')}")
+        logger.info("[FLIGHT_FORMATTER] Sorting flights by user preferences: %s", user_preferences)
+        logger.info("[FLIGHT_FORMATTER] Preferences type: %s, values: budget=%s, quality=%s, convenience=%s", type(user_preferences), user_preferences.get('budget'), user_preferences.get('quality'), user_preferences.get('convenience'))
         
         # Calculate preference scores for all flights
         all_flights = formatted_response["outboundFlights"] + formatted_response["returnFlights"]
         if all_flights:
-            # Normalize values for scoring
+            # Normalize values for scoring. Durations are parsed once into a column that
+            # feeds both the min/max range and the per-flight scores below
             prices = [f["price"] for f in all_flights if f.get("price")]
-            durations_hours = []
-            for f in all_flights:
-                duration_str = f.get("duration", "0h 0m")
-                hours = _parse_duration_to_hours(duration_str)
-                durations_hours.append(hours)
+            durations_hours = [_parse_duration_to_hours(f.get("duration", "0h 0m")) for f in all_flights]
             
             min_price = min(prices) if prices else 1
             max_price = max(prices) if prices else 1
             min_duration = min(durations_hours) if durations_hours else 1
             max_duration = max(durations_hours) if durations_hours else 1
             
-            logger.info(f"[FLIGHT_FORMATTER] Price range: ${min_price:.2f} - ${max_price:.2f}, Duration range: {min_duration:.2f}h - {max_duration:.2f}h")
-            
-            # Calculate scores for outbound flights
-            for flight in formatted_response["outboundFlights"]:
-                score = _calculate_preference_score(
-                    flight, user_preferences, min_price, max_price, min_duration, max_duration
-                )
-                flight['preferenceScore'] = score
-                logger.info(f"[FLIGHT_FORMATTER] Outbound Flight {flight.get('flightNumber')} - Price: ${flight.get('price')}, Stops: {flight.get('stops')}, Duration: {flight.get('duration')}, Score: {score:.4f}")
+            logger.info("[FLIGHT_FORMATTER] Price range: $%.2f - $%.2f, Duration range: %.2fh - %.2fh", min_price, max_price, min_duration, max_duration)
             
-            # Calculate scores for return flights
-            for flight in formatted_response["returnFlights"]:
+            # Calculate scores for outbound flights, then return flights (same order as all_flights)
+            outbound_count = len(formatted_response["outboundFlights"])
+            for index, (flight, duration_hours) in enumerate(zip(all_flights, durations_hours)):
                 score = _calculate_preference_score(
-                    flight, user_preferences, min_price, max_price, min_duration, max_duration
+                    flight, user_preferences, min_price, max_price, min_duration, max_duration,
+                    duration_hours=duration_hours
                 )
                 flight['preferenceScore'] = score
-                logger.info(f"[FLIGHT_FORMATTER] Return Flight {flight.get('flightNumber')} - Price: ${flight.get('price')}, Stops: {flight.get('stops')}, Duration: {flight.get('duration')}, Score: {score:.4f}")
+                direction = "Outbound" if index < outbound_count else "Return"
+                if info:
+                    logger.info("[FLIGHT_FORMATTER] %s Flight %s - Price: $%s, Stops: %s, Duration: %s, Score: %.4f", direction, flight.get('flightNumber'), flight.get('price'), flight.get('stops'), flight.get('duration'), score)
             
             # Sort by preference score (higher is better)
             formatted_response["outboundFlights"].sort(key=lambda x: x.get('preferenceScore', 0), reverse=True)
@@ -170,22 +211,23 @@ def format_flight_for_dashboard(
                 best_outbound = formatted_response["outboundFlights"][0]
                 best_outbound["isOptimal"] = True
                 best_outbound["optimalFlight"] = True
-                logger.info(f"[FLIGHT_FORMATTER] Marked optimal outbound flight: {best_outbound.get('flightNumber')} (score: {best_outbound.get('preferenceScore', 0):.4f})")
+                logger.info("[FLIGHT_FORMATTER] Marked optimal outbound flight: %s (score: %.4f)", best_outbound.get('flightNumber'), best_outbound.get('preferenceScore', 0))
             
             if formatted_response["returnFlights"]:
                 best_return = formatted_response["returnFlights"][0]
                 best_return["isOptimal"] = True
                 best_return["optimalFlight"] = True
-                logger.info(f"[FLIGHT_FORMATTER] Marked optimal return flight: {best_return.get('flightNumber')} (score: {best_return.get('preferenceScore', 0):.4f})")
+                logger.info("[FLIGHT_FORMATTER] Marked optimal return flight: %s (score: %.4f)", best_return.get('flightNumber'), best_return.get('preferenceScore', 0))
             
-            logger.info(f"[FLIGHT_FORMATTER] Top outbound flight after sorting: {formatted_response['outboundFlights'][0].get('flightNumber') if formatted_response['outboundFlights'] else 'None'} (score: {formatted_response['outboundFlights'][0].get('preferenceScore', 0) if formatted_response['outboundFlights'] else 0})")
+            logger.info("[FLIGHT_FORMATTER] Top outbound flight after sorting: %s (score: %s)", formatted_response['outboundFlights'][0].get('flightNumber') if formatted_response['outboundFlights'] else 'None', formatted_response['outboundFlights'][0].get('preferenceScore', 0) if formatted_response['outboundFlights'] else 0)
     else:
         # Default: Sort by price
         logger.info("[FLIGHT_FORMATTER] No user preferences - sorting by price")
-        formatted_response["outboundFlights"].sort(key=lambda x: x["price"])
-        formatted_response["returnFlights"].sort(key=lambda x: x["price"])
+        formatted_response["outboundFlights"].sort(key=_price_key)
+        formatted_response["returnFlights"].sort(key=_price_key)
     
-    # Mark best deals (only if preferences weren't used, otherwise already marked above)
+    # Mark best deals (only if preferences weren't used, otherwise already marked above).
+    # The lists were just sorted by price, so _mark_best_deals doesn't sort again
     if not user_preferences:
         _mark_best_deals(formatted_response["outboundFlights"])
         _mark_best_deals(formatted_response["returnFlights"])
@@ -222,7 +264,7 @@ def format_flight_for_dashboard(
     formatted_response["outboundFlights"] = [f for f in formatted_response["outboundFlights"] if not is_placeholder_flight(f)]
     formatted_response["returnFlights"] = [f for f in formatted_response["returnFlights"] if not is_placeholder_flight(f)]
     
-    logger.info(f"[FLIGHT_FORMATTER] After filtering placeholders: {len(formatted_response['outboundFlights'])} outbound, {len(formatted_response['returnFlights'])} return flights")
+    logger.info("[FLIGHT_FORMATTER] After filtering placeholders: %s outbound, %s return flights", len(formatted_response['outboundFlights']), len(formatted_response['returnFlights']))
     
     return formatted_response
 
@@ -234,20 +276,25 @@ def _format_single_flight(
 ) -> Optional[Dict[str, Any]]:
     """Format a single flight itinerary"""
     
-    segments = itinerary.get("segments", [])
+    segments: List[Dict[str, Any]] = itinerary.get("segments", [])
     if not segments:
-        logger.warning(f"[FLIGHT_FORMATTER] No segments in itinerary {itinerary_index}")
+        logger.warning("[FLIGHT_FORMATTER] No segments in itinerary %s", itinerary_index)
         return None
     
     first_segment = segments[0]
     last_segment = segments[-1]
-    
-    # Get airline codes from all segments
-    airline_codes = []
-    for segment in segments:
-        airline_code = segment.get("airline", segment.get("carrierCode", ""))
-        if airline_code:
-            airline_codes.append(airline_code)
+    departure: Mapping[str, Any] = first_segment.get("departure") or _EMPTY
+    arrival: Mapping[str, Any] = last_segment.get("arrival") or _EMPTY
+    info = logger.isEnabledFor(logging.INFO)
+    
+    # Get airline codes from all segments (slim segments carry "airline", raw ones "carrierCode")
+    airline_codes = [
+        code for code in (
+            segment["airline"] if "airline" in segment else segment.get("carrierCode", "")
+            for segment in segments
+        )
+        if code
+    ]
     
     # Determine airline name: if all segments have same airline, use that; otherwise "Multiple Airlines"
     if len(set(airline_codes)) == 1 and airline_codes:
@@ -265,11 +312,12 @@ def _format_single_flight(
     
     flight_number = first_segment.get("flight_number", first_segment.get("number", ""))
     
-    logger.info(f"[FLIGHT_FORMATTER] Processing flight: {airline_code} {flight_number}, segments: {len(segments)}, airlines: {airline_codes}")
+    if info:
+        logger.info("[FLIGHT_FORMATTER] Processing flight: %s %s, segments: %s, airlines: %s", airline_code, flight_number, len(segments), airline_codes)
     
     # Parse departure and arrival times
-    dep_time_str = first_segment.get("departure", {}).get("time", "")
-    arr_time_str = last_segment.get("arrival", {}).get("time", "")
+    dep_time_str = departure.get("time", "")
+    arr_time_str = arrival.get("time", "")
     
     dep_display = _format_time_display(dep_time_str)
     arr_display = _format_time_display(arr_time_str)
@@ -287,7 +335,26 @@ def _format_single_flight(
     
     # Get original currency from flight offer (preserve EUR from Amadeus)
     original_currency = flight_offer.get("currency", "EUR")
-    logger.info(f"[FLIGHT_FORMATTER] CURRENCY CHECK: Flight {flight_number_display} - Currency: {original_currency}, Price: {price}")
+    if info:
+        logger.info("[FLIGHT_FORMATTER] CURRENCY CHECK: Flight %s - Currency: %s, Price: %s", flight_number_display, original_currency, price)
+    
+    # Validate that we have minimum required fields before building the record,
+    # so rejected itineraries don't allocate a result dict and booking link
+    if not airline_name or airline_name == 'Unknown':
+        logger.warning("[FLIGHT_FORMATTER] Invalid flight: missing airline")
+        return None
+    if not flight_number_display or flight_number_display == 'Unknown':
+        logger.warning("[FLIGHT_FORMATTER] Invalid flight: missing flight number")
+        return None
+    if not dep_display or dep_display == 'N/A':
+        logger.warning("[FLIGHT_FORMATTER] Invalid flight: missing departure time")
+        return None
+    if not arr_display or arr_display == 'N/A':
+        logger.warning("[FLIGHT_FORMATTER] Invalid flight: missing arrival time")
+        return None
+    if price <= 0:
+        logger.warning("[FLIGHT_FORMATTER] Invalid flight: invalid price %s", price)
+        return None
     
     result = {
         "id": f"{flight_offer.get('id', '')}_{itinerary_index}",
@@ -301,8 +368,8 @@ def _format_single_flight(
         "stops": len(segments) - 1,
         "segments": segments,  # Include segments for layover information
         "isOptimal": False,  # Will be set later
-        "departureAirport": first_segment.get("departure", {}).get("iataCode", ""),
-        "arrivalAirport": last_segment.get("arrival", {}).get("iataCode", ""),
+        "departureAirport": departure.get("iataCode", ""),
+        "arrivalAirport": arrival.get("iataCode", ""),
         "bookingLink": _generate_booking_link(airline_name, flight_number_display.replace(' ', ''))
     }
     
@@ -312,64 +379,59 @@ def _format_single_flight(
     if '_destination_airport' in flight_offer:
         result['_destination_airport'] = flight_offer['_destination_airport']
     
-    # Validate that we have minimum required fields
-    if not result.get('airline') or result.get('airline') == 'Unknown':
-        logger.warning(f"[FLIGHT_FORMATTER] Invalid flight: missing airline")
-        return None
-    if not result.get('flightNumber') or result.get('flightNumber') == 'Unknown':
-        logger.warning(f"[FLIGHT_FORMATTER] Invalid flight: missing flight number")
-        return None
-    if not result.get('departure') or result.get('departure') == 'N/A':
-        logger.warning(f"[FLIGHT_FORMATTER] Invalid flight: missing departure time")
-        return None
-    if not result.get('arrival') or result.get('arrival') == 'N/A':
-        logger.warning(f"[FLIGHT_FORMATTER] Invalid flight: missing arrival time")
-        return None
-    if price <= 0:
-        logger.warning(f"[FLIGHT_FORMATTER] Invalid flight: invalid price {price}")
-        return None
-    
-    logger.info(f"[FLIGHT_FORMATTER] Formatted flight: {result['airline']} {result['flightNumber']} - {dep_display} to {arr_display}")
-    logger.info(f"[FLIGHT_FORMATTER] Flight details: Price=${price}, Stops={result['stops']}, DepartureAirport={result['departureAirport']}, ArrivalAirport={result['arrivalAirport']}")
+    if info:
+        logger.info("[FLIGHT_FORMATTER] Formatted flight: %s %s - %s to %s", result['airline'], result['flightNumber'], dep_display, arr_display)
+        logger.info("[FLIGHT_FORMATTER] Flight details: Price=$%s, Stops=%s, DepartureAirport=%s, ArrivalAirport=%s", price, result['stops'], result['departureAirport'], result['arrivalAirport'])
     return result
 
+@lru_cache(maxsize=4096)
 def _format_time_display(time_str: str) -> str:
     """Format ISO time string to display format"""
     if not time_str:
         return "N/A"
     
     try:
-        # Parse ISO format with timezone
-        if time_str.endswith("Z"):
-            dt = datetime.fromisoformat(time_str.replace("Z", "+00:00"))
-        elif "+" in time_str or time_str.count("-") > 2:
-            # Has timezone info
-            dt = datetime.fromisoformat(time_str)
-        else:
-            # No timezone info, assume UTC
-            dt = datetime.fromisoformat(time_str + "+00:00")
-        
-        return dt.strftime("%I:%M %p")
+        # Amadeus sends ISO-8601 local times (2024-12-15T08:30:00). fromisoformat also takes
+        # a trailing Z or UTC offset as-is on 3.11+, and only the wall-clock time is displayed.
+        # Cached because the same timestamps recur across segments and itineraries.
+        return datetime.fromisoformat(time_str).strftime("%I:%M %p")
     except Exception as e:
-        logger.warning(f"[FLIGHT_FORMATTER] Failed to parse time '{time_str}': {e}")
+        logger.warning("[FLIGHT_FORMATTER] Failed to parse time '%s': %s", time_str, e)
         # Try alternate formats
         try:
             # Try without timezone
             dt = datetime.strptime(time_str[:16], "%Y-%m-%dT%H:%M")
             return dt.strftime("%I:%M %p")
         except Exception as e2:
-            logger.warning(f"[FLIGHT_FORMATTER] Failed to parse time with alternate format: {e2}")
+            logger.warning("[FLIGHT_FORMATTER] Failed to parse time with alternate format: %s", e2)
             return time_str
 
 def _format_date_display(date_str: str) -> str:
     """Format date string for display"""
     if not date_str:
         return ""
+    # Anything but a string can't parse, and may not be hashable for the cache
+    if not isinstance(date_str, str):
+        return date_str
+    return _format_date_string(date_str)
+
+@lru_cache(maxsize=1024)
+def _format_date_string(date_str: str) -> str:
+    """Format a non-empty date string for display; unparseable input is returned unchanged"""
+    # Fast path for the usual YYYY-MM-DD form: slice the fields directly
+    # instead of going through the generic format parser
+    if len(date_str) == 10 and date_str[4] == '-' and date_str[7] == '-' and date_str.isascii():
+        year, month, day = date_str[:4], date_str[5:7], date_str[8:10]
+        if year.isdigit() and month.isdigit() and day.isdigit():
+            try:
+                parsed = date(int(year), int(month), int(day))
+            except ValueError:
+                return date_str
+            return f"{_MONTH_ABBR[parsed.month - 1]} {parsed.day:02d}, {parsed.year}"
     
     try:
-        dt = datetime.strptime(date_str, "%Y-%m-%d")
-        return dt.strftime("%b %d, %Y")
-    except:
+        return datetime.strptime(date_str, "%Y-%m-%d").strftime("%b %d, %Y")
+    except ValueError:
         return date_str
 
 def _format_duration(duration_str: str) -> str:
@@ -377,10 +439,19 @@ def _format_duration(duration_str: str) -> str:
     if not duration_str:
         return "N/A"
     
-    # ISO duration format: PT3H30M
-    import re
-    
-    match = re.match(r'PT(?:(\d+)H)?(?:(\d+)M)?', duration_str)
+    # ISO duration format: PT3H30M. Almost every value is plain hours/minutes, which a
+    # couple of str.partition calls split without touching the regex engine
+    if duration_str.startswith("PT"):
+        hours, has_hours, rest = duration_str[2:].partition("H")
+        if not has_hours:
+            hours, rest = "0", duration_str[2:]
+        minutes, has_minutes, _ = rest.partition("M")
+        if not has_minutes:
+            minutes = "0"
+        if hours.isdecimal() and minutes.isdecimal():
+            return f"{hours}h {minutes}m"
+    
+    match = _ISO_DURATION_MATCH(duration_str)
     if match:
         hours = match.group(1) or "0"
         minutes = match.group(2) or "0"
@@ -388,83 +459,82 @@ def _format_duration(duration_str: str) -> str:
     
     return duration_str
 
+# Airline code -> display name, built once at import rather than per lookup
+_AIRLINE_NAMES: Dict[str, str] = {
+    # Major US Airlines
+    "UA": "United Airlines",
+    "AA": "American Airlines", 
+    "DL": "Delta Airlines",
+    "WN": "Southwest Airlines",
+    "B6": "JetBlue Airways",
+    "NK": "Spirit Airlines",
+    "F9": "Frontier Airlines",
+    "AS": "Alaska Airlines",
+    "HA": "Hawaiian Airlines",
+    
+    # European Airlines
+    "BA": "British Airways",
+    "LH": "Lufthansa",
+    "AF": "Air France",
+    "KL": "KLM Royal Dutch Airlines",
+    "OS": "Austrian Airlines",
+    "LX": "SWISS",
+    "SK": "SAS Scandinavian Airlines",
+    "AZ": "ITA Airways",
+    "IB": "Iberia",
+    "TP": "TAP Air Portugal",
+    "SN": "Brussels Airlines",
+    "LO": "LOT Polish Airlines",
+    "OK": "Czech Airlines",
+    "A3": "Aegean Airlines",
+    "TK": "Turkish Airlines",
+    "SU": "Aeroflot",
+    "PC": "Pegasus Airlines",
+    
+    # Middle East & Asia
+    "EK": "Emirates",
+    "QR": "Qatar Airways",
+    "EY": "Etihad Airways",
+    "SV": "Saudia",
+    "SQ": "Singapore Airlines",
+    "CX": "Cathay Pacific",
+    "NH": "All Nippon Airways",
+    "JL": "Japan Airlines",
+    "TG": "Thai Airways",
+    "MH": "Malaysia Airlines",
+    "GA": "Garuda Indonesia",
+    "CI": "China Airlines",
+    "BR": "EVA Air",
+    "OZ": "Asiana Airlines",
+    "KE": "Korean Air",
+    
+    # Other Major Airlines
+    "AC": "Air Canada",
+    "QF": "Qantas",
+    "MS": "EgyptAir",
+    "ET": "Ethiopian Airlines",
+    "SA": "South African Airways",
+    "AR": "Aerolíneas Argentinas",
+    "LA": "LATAM Airlines",
+    "CM": "Copa Airlines",
+    "AV": "Avianca",
+    "JJ": "LATAM Brasil",
+    "AM": "Aeroméxico",
+    "VS": "Virgin Atlantic",
+    "VX": "Virgin America",
+}
+
 def _get_airline_name(airline_code: str) -> str:
     """Get airline name from code"""
-    
-    airline_names = {
-        # Major US Airlines
-        "UA": "United Airlines",
-        "AA": "American Airlines", 
-        "DL": "Delta Airlines",
-        "WN": "Southwest Airlines",
-        "B6": "JetBlue Airways",
-        "NK": "Spirit Airlines",
-        "F9": "Frontier Airlines",
-        "AS": "Alaska Airlines",
-        "HA": "Hawaiian Airlines",
-        
-        # European Airlines
-        "BA": "British Airways",
-        "LH": "Lufthansa",
-        "AF": "Air France",
-        "KL": "KLM Royal Dutch Airlines",
-        "OS": "Austrian Airlines",
-        "LX": "SWISS",
-        "SK": "SAS Scandinavian Airlines",
-        "AZ": "ITA Airways",
-        "IB": "Iberia",
-        "TP": "TAP Air Portugal",
-        "SN": "Brussels Airlines",
-        "LO": "LOT Polish Airlines",
-        "OK": "Czech Airlines",
-        "A3": "Aegean Airlines",
-        "TK": "Turkish Airlines",
-        "SU": "Aeroflot",
-        "PC": "Pegasus Airlines",
-        
-        # Middle East & Asia
-        "EK": "Emirates",
-        "QR": "Qatar Airways",
-        "EY": "Etihad Airways",
-        "SV": "Saudia",
-        "SQ": "Singapore Airlines",
-        "CX": "Cathay Pacific",
-        "NH": "All Nippon Airways",
-        "JL": "Japan Airlines",
-        "TG": "Thai Airways",
-        "MH": "Malaysia Airlines",
-        "GA": "Garuda Indonesia",
-        "CI": "China Airlines",
-        "BR": "EVA Air",
-        "OZ": "Asiana Airlines",
-        "KE": "Korean Air",
-        
-        # Other Major Airlines
-        "AC": "Air Canada",
-        "QF": "Qantas",
-        "MS": "EgyptAir",
-        "ET": "Ethiopian Airlines",
-        "SA": "South African Airways",
-        "AR": "Aerolíneas Argentinas",
-        "LA": "LATAM Airlines",
-        "CM": "Copa Airlines",
-        "AV": "Avianca",
-        "JJ": "LATAM Brasil",
-        "AM": "Aeroméxico",
-        "VS": "Virgin Atlantic",
-        "VX": "Virgin America",
-    }
-    
-    return airline_names.get(airline_code, airline_code)
+    return _AIRLINE_NAMES.get(airline_code, airline_code)
 
 def _parse_duration_to_hours(duration_str: str) -> float:
     """Parse duration string (e.g., '8h 30m') to hours as float"""
     if not duration_str:
         return 0.0
     
-    import re
     # Match patterns like "8h 30m" or "PT8H30M"
-    match = re.match(r'(?:PT)?(?:(\d+)H)?(?:(\d+)M)?', duration_str.replace(' ', ''))
+    match = _DURATION_HOURS_MATCH(duration_str.replace(' ', ''))
     if match:
         hours = float(match.group(1) or 0)
         minutes = float(match.group(2) or 0)
@@ -478,7 +548,8 @@ def _calculate_preference_score(
     min_price: float,
     max_price: float,
     min_duration: float,
-    max_duration: float
+    max_duration: float,
+    duration_hours: Optional[float] = None
 ) -> float:
     """
     Calculate preference score for a flight based on user preferences
@@ -492,12 +563,14 @@ def _calculate_preference_score(
     - normalized_price_score: (max_price - price) / (max_price - min_price) [lower price is better]
     - normalized_quality_score: based on stops (non-stop = 1.0, 1 stop = 0.7, 2+ stops = 0.4) and airline rating
     - normalized_convenience_score: (max_duration - duration) / (max_duration - min_duration) [shorter is better]
+    
+    duration_hours may be passed in when the caller has already parsed the flight's duration.
     """
     budget_weight = preferences.get('budget', 0.33)
     quality_weight = preferences.get('quality', 0.33)
     convenience_weight = preferences.get('convenience', 0.34)
     
-    logger.debug(f"[FLIGHT_FORMATTER] Score calculation - Weights: budget={budget_weight:.3f}, quality={quality_weight:.3f}, convenience={convenience_weight:.3f}")
+    logger.debug("[FLIGHT_FORMATTER] Score calculation - Weights: budget=%.3f, quality=%.3f, convenience=%.3f", budget_weight, quality_weight, convenience_weight)
     
     # Normalize price score (lower price = higher score)
     price = flight.get('price', max_price)
@@ -516,8 +589,8 @@ def _calculate_preference_score(
         quality_score = 0.4  # 2+ stops is lower quality
     
     # Normalize convenience score (shorter duration = higher score)
-    duration_str = flight.get('duration', '0h 0m')
-    duration_hours = _parse_duration_to_hours(duration_str)
+    if duration_hours is None:
+        duration_hours = _parse_duration_to_hours(flight.get('duration', '0h 0m'))
     
     if max_duration > min_duration:
         normalized_convenience_score = (max_duration - duration_hours) / (max_duration - min_duration)
@@ -531,12 +604,17 @@ def _calculate_preference_score(
         convenience_weight * normalized_convenience_score
     )
     
-    logger.debug(f"[FLIGHT_FORMATTER] Score calculation for {flight.get('flightNumber')}: "
-                f"price=${price:.2f}, stops={stops}, duration={duration_hours:.2f}h | "
-                f"price_score={normalized_price_score:.3f} (weight={budget_weight:.3f}), "
-                f"quality_score={quality_score:.3f} (weight={quality_weight:.3f}), "
-                f"convenience_score={normalized_convenience_score:.3f} (weight={convenience_weight:.3f}), "
-                f"total={total_score:.4f}")
+    logger.debug("[FLIGHT_FORMATTER] Score calculation for %s: "
+                 "price=$%.2f, stops=%s, duration=%.2fh | "
+                 "price_score=%.3f (weight=%.3f), "
+                 "quality_score=%.3f (weight=%.3f), "
+                 "convenience_score=%.3f (weight=%.3f), "
+                 "total=%.4f",
+                 flight.get('flightNumber'), price, stops, duration_hours,
+                 normalized_price_score, budget_weight,
+                 quality_score, quality_weight,
+                 normalized_convenience_score, convenience_weight,
+                 total_score)
     
     return total_score
 
@@ -552,108 +630,94 @@ def _generate_price_trend_data(
     else:
         base_price = min(prices)
     
-    trend_data = []
-    
     # Generate 7 days of price data
     try:
         base_date = datetime.strptime(departure_date, "%Y-%m-%d")
-    except:
+    except (ValueError, TypeError):
         base_date = datetime.now()
     
-    for i in range(-3, 4):  # -3 to +3 days from departure
-        date = base_date.replace(day=base_date.day + i)
-        
-        # Simulate price variation
-        if i < 0:
-            # Past dates - slightly higher
-            price_variation = base_price * (1 + abs(i) * 0.05)
-        elif i == 0:
-            # Departure date - use base price
-            price_variation = base_price
-        else:
-            # Future dates - gradually increase
-            price_variation = base_price * (1 + i * 0.03)
-        
-        trend_data.append({
-            "date": date.strftime("%b %d"),
-            "price": round(price_variation, 2),
-            "optimal": round(base_price, 2)
-        })
-    
-    return trend_data
+    optimal = round(base_price, 2)
+    # -3 to +3 days from departure; timedelta so the window can cross month boundaries
+    return [
+        {
+            "date": (base_date + timedelta(days=offset)).strftime("%b %d"),
+            "price": round(base_price * multiplier, 2),
+            "optimal": optimal
+        }
+        for offset, multiplier in _PRICE_TREND_MULTIPLIERS
+    ]
 
+# Map airline names to their booking URLs
+_AIRLINE_BOOKING_URLS: Dict[str, str] = {
+    "Air France": "https://www.airfrance.com",
+    "Delta Airlines": "https://www.delta.com",
+    "American Airlines": "https://www.aa.com",
+    "United Airlines": "https://www.united.com",
+    "Lufthansa": "https://www.lufthansa.com",
+    "British Airways": "https://www.britishairways.com",
+    "KLM Royal Dutch Airlines": "https://www.klm.com",
+    "Iberia": "https://www.iberia.com",
+    "ITA Airways": "https://www.ita-airways.com",
+    "SWISS": "https://www.swiss.com",
+    "Austrian Airlines": "https://www.austrian.com",
+    "SAS Scandinavian Airlines": "https://www.sas.se",
+    "TAP Air Portugal": "https://www.flytap.com",
+    "Virgin Atlantic": "https://www.virgin-atlantic.com",
+    "Emirates": "https://www.emirates.com",
+    "Qatar Airways": "https://www.qatarairways.com",
+    "Turkish Airlines": "https://www.turkishairlines.com",
+    "Aeroflot": "https://www.aeroflot.com",
+    "Air Canada": "https://www.aircanada.com",
+    "JetBlue Airways": "https://www.jetblue.com",
+    "Southwest Airlines": "https://www.southwest.com",
+    "Alaska Airlines": "https://www.alaskaair.com",
+    "Spirit Airlines": "https://www.spirit.com",
+    "Frontier Airlines": "https://www.flyfrontier.com",
+    "Hawaiian Airlines": "https://www.hawaiianairlines.com",
+    "Singapore Airlines": "https://www.singaporeair.com",
+    "Cathay Pacific": "https://www.cathaypacific.com",
+    "All Nippon Airways": "https://www.ana.co.jp",
+    "Japan Airlines": "https://www.jal.co.jp",
+    "Thai Airways": "https://www.thaiairways.com",
+    "Malaysia Airlines": "https://www.malaysiaairlines.com",
+    "Garuda Indonesia": "https://www.garuda-indonesia.com",
+    "China Airlines": "https://www.china-airlines.com",
+    "EVA Air": "https://www.evaair.com",
+    "Asiana Airlines": "https://www.flyasiana.com",
+    "Korean Air": "https://www.koreanair.com",
+    "Qantas": "https://www.qantas.com",
+    "EgyptAir": "https://www.egyptair.com",
+    "Ethiopian Airlines": "https://www.ethiopianairlines.com",
+    "South African Airways": "https://www.flysaa.com",
+    "Aerolíneas Argentinas": "https://www.aerolineas.com.ar",
+    "LATAM Airlines": "https://www.latam.com",
+    "Copa Airlines": "https://www.copaair.com",
+    "Avianca": "https://www.avianca.com",
+    "LATAM Brasil": "https://www.latam.com",
+    "Aeroméxico": "https://www.aeromexico.com",
+    "Virgin America": "https://www.virginamerica.com",
+}
+
+_GENERIC_BOOKING_URL = "https://www.google.com/search?q=flight+booking"
+_format_search_booking_url = "https://www.google.com/search?q={airline}+{code}+booking".format
+
+@lru_cache(maxsize=1024)
 def _generate_booking_link(airline_name: str, flight_code: str) -> str:
     """Generate booking link for a flight based on airline and flight code"""
     if not airline_name or not flight_code:
-        return "https://www.google.com/search?q=flight+booking"
-    
-    # Map airline names to their booking URLs
-    airline_booking_urls = {
-        "Air France": "https://www.airfrance.com",
-        "Delta Airlines": "https://www.delta.com",
-        "American Airlines": "https://www.aa.com",
-        "United Airlines": "https://www.united.com",
-        "Lufthansa": "https://www.lufthansa.com",
-        "British Airways": "https://www.britishairways.com",
-        "KLM Royal Dutch Airlines": "https://www.klm.com",
-        "Iberia": "https://www.iberia.com",
-        "ITA Airways": "https://www.ita-airways.com",
-        "SWISS": "https://www.swiss.com",
-        "Austrian Airlines": "https://www.austrian.com",
-        "SAS Scandinavian Airlines": "https://www.sas.se",
-        "TAP Air Portugal": "https://www.flytap.com",
-        "Virgin Atlantic": "https://www.virgin-atlantic.com",
-        "Emirates": "https://www.emirates.com",
-        "Qatar Airways": "https://www.qatarairways.com",
-        "Turkish Airlines": "https://www.turkishairlines.com",
-        "Aeroflot": "https://www.aeroflot.com",
-        "Air Canada": "https://www.aircanada.com",
-        "JetBlue Airways": "https://www.jetblue.com",
-        "Southwest Airlines": "https://www.southwest.com",
-        "Alaska Airlines": "https://www.alaskaair.com",
-        "Spirit Airlines": "https://www.spirit.com",
-        "Frontier Airlines": "https://www.flyfrontier.com",
-        "Hawaiian Airlines": "https://www.hawaiianairlines.com",
-        "Singapore Airlines": "https://www.singaporeair.com",
-        "Cathay Pacific": "https://www.cathaypacific.com",
-        "All Nippon Airways": "https://www.ana.co.jp",
-        "Japan Airlines": "https://www.jal.co.jp",
-        "Thai Airways": "https://www.thaiairways.com",
-        "Malaysia Airlines": "https://www.malaysiaairlines.com",
-        "Garuda Indonesia": "https://www.garuda-indonesia.com",
-        "China Airlines": "https://www.china-airlines.com",
-        "EVA Air": "https://www.evaair.com",
-        "Asiana Airlines": "https://www.flyasiana.com",
-        "Korean Air": "https://www.koreanair.com",
-        "Qantas": "https://www.qantas.com",
-        "EgyptAir": "https://www.egyptair.com",
-        "Ethiopian Airlines": "https://www.ethiopianairlines.com",
-        "South African Airways": "https://www.flysaa.com",
-        "Aerolíneas Argentinas": "https://www.aerolineas.com.ar",
-        "LATAM Airlines": "https://www.latam.com",
-        "Copa Airlines": "https://www.copaair.com",
-        "Avianca": "https://www.avianca.com",
-        "LATAM Brasil": "https://www.latam.com",
-        "Aeroméxico": "https://www.aeromexico.com",
-        "Virgin America": "https://www.virginamerica.com",
-    }
+        return _GENERIC_BOOKING_URL
+    
+    booking_url = _AIRLINE_BOOKING_URLS.get(airline_name)
+    if booking_url is not None:
+        return booking_url
     
-    return airline_booking_urls.get(airline_name, f"https://www.google.com/search?q={airline_name}+{flight_code}+booking")
+    # Unknown airline: fall back to a web search, with both terms quoted for the query string
+    return _format_search_booking_url(airline=quote_plus(airline_name), code=quote_plus(flight_code))
 
 def _mark_best_deals(flights: List[Dict[str, Any]]) -> None:
-    """Mark the best deals in a list of flights"""
-    
-    if not flights:
-        return
-    
-    # Sort by price
-    flights.sort(key=lambda x: x["price"])
-    
-    # Mark top 3 cheapest as optimal
-    for i, flight in enumerate(flights[:3]):
-        flight["isOptimal"] = True
+    """Mark the best deals in a list of flights already sorted by price"""
     
-    # Also mark any direct flights in top 5
-    for flight in flights[:5]:
-        if flight["stops"] == 0:
+    # Mark top 3 cheapest as optimal, plus any direct flights in the top 5
+    for index, flight in enumerate(islice(flights, 5)):
+        if index < 3 or flight["stops"] == 0:
             flight["isOptimal"] = True
@@ -153,6 +153,17 @@ AIRPORT_CODES: Dict[str, str] = {
     "HND": "Tokyo Haneda",
 }
 
+def is_valid_iata(code: str) -> bool:
+    """Check that code is exactly three uppercase ASCII letters (A-Z)"""
+    if not code:
+        return False
+    b = code.encode()
+    if len(b) != 3:
+        return False
+    # SWAR range test on the packed bytes: any byte outside 'A'..'Z' borrows into its high bit
+    x = b[0] << 16 | b[1] << 8 | b[2]
+    return ((x - 0x414141) | (0x5A5A5A - x)) & 0x808080 == 0
+
 def get_iata_code(city_name: str) -> Optional[str]:
     """
     Get IATA code for a city name
@@ -1,6 +1,7 @@
 """
 Intent Detection Service using GPT for travel query analysis
 """
+import asyncio
 import json
 import logging
 from typing import Dict, List, Optional, Any
@@ -12,6 +13,33 @@ from .iata_codes import get_iata_code
 
 logger = logging.getLogger(__name__)
 
+# Keywords that mean the user REALLY wants a transfer
+_TRANSFER_KEYWORDS = (
+    "airport", "terminal", "pickup", "pick up", "dropoff", "drop off",
+    "shuttle", "transfer", "ride to the airport", "from airport", "to the airport"
+)
+
+# Keywords meaning "normal activities"
+_ACTIVITY_KEYWORDS = (
+    "activity", "activities", "things to do", "tour", "tours",
+    "day trip", "sightseeing", "fun", "museum", "park",
+)
+
+_MONTH_NUMBERS = {
+    "january": "01", "february": "02", "march": "03", "april": "04",
+    "may": "05", "june": "06", "july": "07", "august": "08",
+    "september": "09", "october": "10", "november": "11", "december": "12"
+}
+
+# Date patterns, compiled once at import instead of on every parsed date
+_ISO_DATE_MATCH = re.compile(r'\d{4}-\d{2}-\d{2}').match
+_YEAR_SEARCH = re.compile(r"(19|20)\d{2}").search
+_MONTH_RANGE_SEARCH = {
+    month_name: re.compile(rf"{month_name}\s+(\d+)\s*-\s*(\d+)").search
+    for month_name in _MONTH_NUMBERS
+}
+_MM_DD_FINDALL = re.compile(r'(\d{1,2})/(\d{1,2})').findall
+
 
 class IntentDetector:
     """
@@ -173,7 +201,10 @@ CRITICAL CONTEXT AWARENESS RULES:
 
 Return only the JSON object, no other text."""
 
-            response = self.client.chat.completions.create(
+            # The OpenAI client is synchronous; run it off the event loop so
+            # concurrent analyze_message calls overlap their round-trips
+            response = await asyncio.to_thread(
+                self.client.chat.completions.create,
                 model="gpt-4o-mini",
                 messages=[
                     {"role": "system", "content": "You are a travel intent detection system. Analyze messages and return structured JSON data only."},
@@ -228,25 +259,13 @@ Return only the JSON object, no other text."""
         """
         text = message.lower()
         
-        # Keywords that mean the user REALLY wants a transfer
-        transfer_keywords = [
-            "airport", "terminal", "pickup", "pick up", "dropoff", "drop off",
-            "shuttle", "transfer", "ride to the airport", "from airport", "to the airport"
-        ]
-        
-        # Keywords meaning "normal activities"
-        activity_keywords = [
-            "activity", "activities", "things to do", "tour", "tours",
-            "day trip", "sightseeing", "fun", "museum", "park",
-        ]
-        
         # If user mentions activities and NOT transfers → force activity_search
-        if any(k in text for k in activity_keywords) and not any(k in text for k in transfer_keywords):
+        if any(k in text for k in _ACTIVITY_KEYWORDS) and not any(k in text for k in _TRANSFER_KEYWORDS):
             logger.info(f"[INTENT_OVERRIDE] Overriding to activity_search (activity keywords found, no transfer keywords)")
             return "activity_search"
         
         # If intent was classified as transfer, but user didn't mention transfer keywords → override
-        if raw_intent in ["transfer", "private_car", "transfer_search", "points_of_interest"] and not any(k in text for k in transfer_keywords):
+        if raw_intent in ["transfer", "private_car", "transfer_search", "points_of_interest"] and not any(k in text for k in _TRANSFER_KEYWORDS):
             logger.info(f"[INTENT_OVERRIDE] Overriding {raw_intent} to activity_search (no transfer keywords)")
             return "activity_search"
         
@@ -378,7 +397,7 @@ Return only the JSON object, no other text."""
             return None
         
         # If already in YYYY-MM-DD format, return as is
-        if re.match(r'\d{4}-\d{2}-\d{2}', date_str):
+        if _ISO_DATE_MATCH(date_str):
             return date_str
         
         date_str_lower = date_str.lower().strip()
@@ -402,16 +421,10 @@ Return only the JSON object, no other text."""
             return next_month.strftime("%Y-%m-%d")
         
         # Handle month names with date ranges like "December 10-17"
-        month_mapping = {
-            "january": "01", "february": "02", "march": "03", "april": "04",
-            "may": "05", "june": "06", "july": "07", "august": "08",
-            "september": "09", "october": "10", "november": "11", "december": "12"
-        }
-        
-        for month_name, month_num in month_mapping.items():
+        for month_name, month_num in _MONTH_NUMBERS.items():
             if month_name in date_str_lower:
                 # Try to capture explicit year if present (e.g., "December 2025")
-                year_match = re.search(r"(19|20)\d{2}", date_str_lower)
+                year_match = _YEAR_SEARCH(date_str_lower)
                 if year_match:
                     year = int(year_match.group(0))
                 else:
@@ -425,7 +438,7 @@ Return only the JSON object, no other text."""
                         year = today.year + 1
                 
                 # Check for date range pattern like "december 10-17"
-                range_match = re.search(rf"{month_name}\s+(\d+)\s*-\s*(\d+)", date_str_lower)
+                range_match = _MONTH_RANGE_SEARCH[month_name](date_str_lower)
                 if range_match:
                     # Use the first date in the range
                     day = int(range_match.group(1))
@@ -485,15 +498,11 @@ Return only the JSON object, no other text."""
     
     def _parse_date_range(self, message: str) -> tuple:
         """Parse date ranges like '10/27 to 11/5' or 'October 27th to November 5th'"""
-        import re
-        from datetime import datetime, timedelta
-        
         # Current year
         current_year = datetime.now().year
         
         # Pattern for MM/DD format
-        date_pattern = r'(\d{1,2})/(\d{1,2})'
-        dates = re.findall(date_pattern, message)
+        dates = _MM_DD_FINDALL(message)
         
         if len(dates) >= 2:
             # Parse departure date
@@ -0,0 +1,19 @@
+"""
+Shared setup for the backend test scripts
+"""
+import os
+import sys
+from functools import lru_cache
+from dotenv import load_dotenv
+
+# Make the backend packages (services, ...) importable from any test script
+_BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+if _BACKEND_DIR not in sys.path:
+    sys.path.append(_BACKEND_DIR)
+
+
+@lru_cache(maxsize=1)
+def load_env() -> bool:
+    """Load .env once per process, however many test scripts call it"""
+    load_dotenv()
+    return True
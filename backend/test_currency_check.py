@@ -1,55 +1,77 @@
 """
 Check what currency Amadeus API returns
 """
+import asyncio
 import os
-import sys
 from datetime import datetime, timedelta
-from dotenv import load_dotenv
 
-# Add backend directory to path
-sys.path.append(os.path.dirname(__file__))
+from test_common import load_env
 
-from services.amadeus_service import AmadeusService
+from services.amadeus_service import get_amadeus_service
 
-def check_currency():
+# Routes with different origins and markets, to see currency variations
+CURRENCY_ROUTES = (
+    {
+        "name": "US Domestic (IAD -> LAX)",
+        "origin": "IAD",
+        "destination": "LAX",
+    },
+    {
+        "name": "US to Europe (IAD -> IST)",
+        "origin": "IAD",
+        "destination": "IST",
+    },
+    {
+        "name": "Europe Domestic (PAR -> BCN)",
+        "origin": "PAR",
+        "destination": "BCN",
+    },
+)
+
+async def check_currency():
     """Check currency from Amadeus API"""
     print("=" * 60)
     print("Amadeus API Currency Check")
     print("=" * 60)
     
     # Load environment variables
-    load_dotenv()
+    load_env()
+    
+    missing = [name for name in ("AMADEUS_API_KEY", "AMADEUS_API_SECRET") if not os.getenv(name)]
+    if missing:
+        print(f"✗ Skipping currency check, missing credentials: {', '.join(missing)}")
+        return
     
     # Initialize service
     try:
-        amadeus_service = AmadeusService()
+        amadeus_service = get_amadeus_service()
         print("✓ AmadeusService initialized\n")
     except Exception as e:
         print(f"✗ Failed to initialize AmadeusService: {e}")
         return
     
     # Test with different routes to see currency variations
-    test_cases = [
-        {
-            "name": "US Domestic (IAD -> LAX)",
-            "origin": "IAD",
-            "destination": "LAX",
-        },
-        {
-            "name": "US to Europe (IAD -> IST)",
-            "origin": "IAD",
-            "destination": "IST",
-        },
-        {
-            "name": "Europe Domestic (PAR -> BCN)",
-            "origin": "PAR",
-            "destination": "BCN",
-        },
-    ]
+    test_cases = CURRENCY_ROUTES
     
     departure_date = (datetime.now() + timedelta(days=30)).strftime("%Y-%m-%d")
     
-    for test_case in test_cases:
+    # Fire all route searches at once over the service's pooled session;
+    # results are still reported in test-case order below
+    results = await asyncio.gather(
+        *[
+            asyncio.to_thread(
+                amadeus_service.search_flights,
+                origin=test_case['origin'],
+                destination=test_case['destination'],
+                departure_date=departure_date,
+                adults=1
+            )
+            for test_case in test_cases
+        ],
+        return_exceptions=True
+    )
+    
+    for test_case, result in zip(test_cases, results):
         print(f"\n{'-' * 60}")
         print(f"Test: {test_case['name']}")
         print(f"Route: {test_case['origin']} -> {test_case['destination']}")
@@ -57,12 +79,8 @@ def check_currency():
         print(f"{'-' * 60}")
         
         try:
-            result = amadeus_service.search_flights(
-                origin=test_case['origin'],
-                destination=test_case['destination'],
-                departure_date=departure_date,
-                adults=1
-            )
+            if isinstance(result, Exception):
+                raise result
             
             if result.get('error'):
                 print(f"✗ Error: {result['error']}")
@@ -98,5 +116,5 @@ def check_currency():
     print("=" * 60)
 
 if __name__ == "__main__":
-    check_currency()
+    asyncio.run(check_currency())
 
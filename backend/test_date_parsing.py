@@ -3,13 +3,9 @@
 Test script to verify date parsing fixes
 """
 import asyncio
-import os
-import sys
-from datetime import datetime, timedelta
-from dotenv import load_dotenv
+from datetime import date, datetime, timedelta
 
-# Add backend directory to path
-sys.path.append(os.path.dirname(__file__))
+from test_common import load_env
 
 from services.intent_detector import IntentDetector
 
@@ -20,7 +16,7 @@ async def test_date_parsing():
     print("=" * 50)
     
     # Load environment variables
-    load_dotenv()
+    load_env()
     
     try:
         # Initialize intent detector
@@ -36,8 +32,8 @@ async def test_date_parsing():
         ]
         
         # Create context similar to what main.py provides
-        from datetime import datetime
         now = datetime.now()
+        today = now.date()
         context = {
             'now_iso': now.isoformat(),
             'user_tz': 'America/New_York',
@@ -47,10 +43,17 @@ async def test_date_parsing():
             }
         }
         
-        for i, message in enumerate(test_cases, 1):
+        # Run all cases concurrently, then report them in order
+        intents = await asyncio.gather(
+            *[intent_detector.analyze_message(message, context=context) for message in test_cases],
+            return_exceptions=True
+        )
+        
+        for i, (message, intent) in enumerate(zip(test_cases, intents), 1):
             print(f"\n📝 Test {i}: {message}")
             
-            intent = await intent_detector.analyze_message(message, context=context)
+            if isinstance(intent, Exception):
+                raise intent
             
             print(f"   Intent: {intent['type']} (confidence: {intent['confidence']:.2f})")
             print(f"   Has required params: {intent['has_required_params']}")
@@ -64,16 +67,16 @@ async def test_date_parsing():
                 
                 # Check if dates are in the future
                 try:
-                    dep_dt = datetime.strptime(departure_date, "%Y-%m-%d")
-                    ret_dt = datetime.strptime(return_date, "%Y-%m-%d") if return_date != 'N/A' else None
+                    # Compare calendar dates: a same-day departure is not in the past
+                    dep_dt = date.fromisoformat(departure_date)
+                    ret_dt = date.fromisoformat(return_date) if return_date != 'N/A' else None
                     
-                    now = datetime.now()
-                    if dep_dt < now:
+                    if dep_dt < today:
                         print(f"   ❌ Departure date is in the past!")
                     else:
                         print(f"   ✅ Departure date is in the future")
                     
-                    if ret_dt and ret_dt < now:
+                    if ret_dt and ret_dt < today:
                         print(f"   ❌ Return date is in the past!")
                     elif ret_dt:
                         print(f"   ✅ Return date is in the future")
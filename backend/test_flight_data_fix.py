@@ -3,15 +3,11 @@
 Test script to verify Amadeus data transformation fixes
 """
 import asyncio
-import os
-import sys
 from datetime import datetime, timedelta
-from dotenv import load_dotenv
 
-# Add backend directory to path
-sys.path.append(os.path.dirname(__file__))
+from test_common import load_env
 
-from services.amadeus_service import AmadeusService
+from services.amadeus_service import get_amadeus_service
 from services.flight_formatter import format_flight_for_dashboard
 
 async def test_flight_data_transformation():
@@ -21,11 +17,11 @@ async def test_flight_data_transformation():
     print("=" * 60)
     
     # Load environment variables
-    load_dotenv()
+    load_env()
     
     try:
         # Initialize Amadeus service
-        amadeus_service = AmadeusService()
+        amadeus_service = get_amadeus_service()
         print(f"✅ Amadeus service initialized with base URL: {amadeus_service.base_url}")
         
         # Test flight search
@@ -63,8 +59,10 @@ async def test_flight_data_transformation():
                 if first_itinerary.get('segments'):
                     first_segment = first_itinerary['segments'][0]
                     print(f"   - First segment: {first_segment.get('airline')} {first_segment.get('flight_number')}")
-                    print(f"     Departure: {first_segment.get('departure', {}).get('airport')} {first_segment.get('departure', {}).get('time')}")
-                    print(f"     Arrival: {first_segment.get('arrival', {}).get('airport')} {first_segment.get('arrival', {}).get('time')}")
+                    departure = first_segment.get('departure', {})
+                    arrival = first_segment.get('arrival', {})
+                    print(f"     Departure: {departure.get('airport')} {departure.get('time')}")
+                    print(f"     Arrival: {arrival.get('airport')} {arrival.get('time')}")
         
         # Test flight formatter
         print(f"\n🎨 Testing flight formatter...")
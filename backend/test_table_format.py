@@ -3,88 +3,163 @@
 Test script to verify the new table format with flight codes and booking links
 """
 import asyncio
-import os
+import io
+import logging
 import sys
+from contextlib import redirect_stdout
 from datetime import datetime, timedelta
-from dotenv import load_dotenv
 
-# Add backend directory to path
-sys.path.append(os.path.dirname(__file__))
+from test_common import load_env
 
-from services.amadeus_service import AmadeusService
+from services.amadeus_service import get_amadeus_service
 from services.flight_formatter import format_flight_for_dashboard
 
+logger = logging.getLogger(__name__)
+
+# Search date for every route, fixed at import so all searches (and their cache keys) agree
+FUTURE_DATE = (datetime.now() + timedelta(days=60)).strftime("%Y-%m-%d")
+
+# (origin code, destination code, origin city, destination city)
+ROUTES = (
+    ("JFK", "CDG", "New York", "Paris"),
+    ("JFK", "LHR", "New York", "London"),
+    ("JFK", "FCO", "New York", "Rome"),
+    ("LAX", "NRT", "Los Angeles", "Tokyo"),
+)
+
+# Route searches allowed in flight at once, to stay clear of the Amadeus rate limit
+MAX_CONCURRENT_SEARCHES = 4
+
+async def search_routes(amadeus_service, routes, departure_date):
+    """Search all routes concurrently, at most MAX_CONCURRENT_SEARCHES at a time; results keep route order"""
+    slots = asyncio.Semaphore(MAX_CONCURRENT_SEARCHES)
+    
+    async def search(origin_code, dest_code):
+        async with slots:
+            # search_flights is blocking, so it runs in a worker thread
+            return await asyncio.to_thread(
+                amadeus_service.search_flights,
+                origin=origin_code,
+                destination=dest_code,
+                departure_date=departure_date,
+                adults=1
+            )
+    
+    return await asyncio.gather(*[search(origin_code, dest_code) for origin_code, dest_code, _, _ in routes])
+
+# Stops column text by stop count; counts past the table fall back to formatting
+STOPS_DISPLAY = ("Non-stop", "1 stop") + tuple(f"{stops} stops" for stops in range(2, 8))
+
+# Row template parsed once; format_table_row is its bound formatter
+TABLE_ROW = "| {flight[airline]} | {flight_code} | ${flight[price]} | {flight[duration]} | {stops_display} | {flight[departure]} | [Book Now]({booking_link}) |"
+format_table_row = TABLE_ROW.format
+
+def print_route_table(amadeus_data, route, departure_date, generate_booking_link):
+    """Format one route's search results for the dashboard and print the sample table; returns whether any rows were printed"""
+    origin_code, dest_code, origin_city, dest_city = route
+    print(f"\n✈️  {origin_city} ({origin_code}) → {dest_city} ({dest_code})")
+    
+    if not amadeus_data or amadeus_data.get('error'):
+        print(f"❌ No flight data found: {amadeus_data.get('error', 'Unknown error')}")
+        return False
+    
+    print(f"✅ Found {amadeus_data.get('count', 0)} flights")
+    
+    # Format for dashboard
+    dashboard_data = format_flight_for_dashboard(
+        flight_data=amadeus_data,
+        origin_city=origin_city,
+        dest_city=dest_city,
+        origin_code=origin_code,
+        dest_code=dest_code,
+        departure_date=departure_date
+    )
+    
+    outbound_flights = dashboard_data.get('outboundFlights', [])
+    print(f"✅ Formatted {len(outbound_flights)} outbound flights")
+    
+    # Nothing to sample; skip both sections rather than print empty headers
+    if not outbound_flights:
+        print("   (no flights)")
+        return False
+    
+    # Derive each sample row's display fields once; both sections below reuse them
+    sample_rows = []
+    for flight in outbound_flights[:3]:
+        flight_code = flight.get('flightNumber', '').replace(' ', '')
+        booking_link = generate_booking_link(flight.get('airline', ''), flight_code)
+        stops = flight.get('stops', 0)
+        stops_display = STOPS_DISPLAY[stops] if stops < len(STOPS_DISPLAY) else f"{stops} stops"
+        sample_rows.append((flight, flight_code, booking_link, stops_display))
+    
+    # Assemble both sections and write them out in one call
+    lines = [
+        "\n📊 Sample Table Format:",
+        "=" * 70,
+        "| Airline | Flight Code | Price | Duration | Stops | Departure | Book Now |",
+        "|---------|-------------|-------|----------|-------|-----------|----------|",
+    ]
+    lines.extend(
+        format_table_row(flight=flight, flight_code=flight_code, stops_display=stops_display, booking_link=booking_link)
+        for flight, flight_code, booking_link, stops_display in sample_rows
+    )
+    lines.append("\n🔗 Sample Booking Links:")
+    lines.extend(
+        f"  {flight['airline']} {flight_code}: {booking_link}"
+        for flight, flight_code, booking_link, _ in sample_rows
+    )
+    sys.stdout.write("\n".join(lines) + "\n")
+    return True
+
 async def test_table_format():
     """Test the new table format with flight codes and booking links"""
+    # Collect the whole report in memory and write it out once at the end
+    report = io.StringIO()
+    try:
+        with redirect_stdout(report):
+            await run_table_format()
+    finally:
+        sys.stdout.write(report.getvalue())
+
+async def run_table_format():
+    """Search every route and print its sample table"""
     
     print("🧪 Testing New Table Format with Flight Codes and Booking Links")
     print("=" * 70)
     
     # Load environment variables
-    load_dotenv()
+    load_env()
     
     try:
         # Initialize Amadeus service
-        amadeus_service = AmadeusService()
+        amadeus_service = get_amadeus_service()
         print("✅ Amadeus service initialized")
         
         # Test flight search
-        future_date = (datetime.now() + timedelta(days=60)).strftime("%Y-%m-%d")
+        future_date = FUTURE_DATE
         print(f"📅 Searching for flights on {future_date}")
         
-        amadeus_data = amadeus_service.search_flights(
-            origin="JFK",
-            destination="CDG", 
-            departure_date=future_date,
-            adults=1
-        )
+        results = await search_routes(amadeus_service, ROUTES, future_date)
         
-        if amadeus_data and not amadeus_data.get('error'):
-            print(f"✅ Found {amadeus_data.get('count', 0)} flights")
-            
-            # Format for dashboard
-            dashboard_data = format_flight_for_dashboard(
-                flight_data=amadeus_data,
-                origin_city="New York",
-                dest_city="Paris",
-                origin_code="JFK",
-                dest_code="CDG",
-                departure_date=future_date
-            )
-            
-            print(f"✅ Formatted {len(dashboard_data.get('outboundFlights', []))} outbound flights")
-            
-            # Test table generation
+        # Test table generation; main is imported once here, not per route, and only
+        # when some route has flights to render, since importing it initializes the whole app
+        _generate_booking_link = None
+        if any(amadeus_data and not amadeus_data.get('error') for amadeus_data in results):
             from main import _generate_booking_link
-            
-            print("\n📊 Sample Table Format:")
-            print("=" * 70)
-            print("| Airline | Flight Code | Price | Duration | Stops | Departure | Book Now |")
-            print("|---------|-------------|-------|----------|-------|-----------|----------|")
-            
-            for flight in dashboard_data.get('outboundFlights', [])[:3]:
-                flight_code = flight.get('flightNumber', '').replace(' ', '')
-                booking_link = _generate_booking_link(flight.get('airline', ''), flight_code)
-                stops = flight.get('stops', 0)
-                stops_display = "Non-stop" if stops == 0 else f"{stops} stop{'s' if stops > 1 else ''}"
-                
-                print(f"| {flight['airline']} | {flight_code} | ${flight['price']} | {flight['duration']} | {stops_display} | {flight['departure']} | [Book Now]({booking_link}) |")
-            
-            print("\n🔗 Sample Booking Links:")
-            for flight in dashboard_data.get('outboundFlights', [])[:3]:
-                flight_code = flight.get('flightNumber', '').replace(' ', '')
-                booking_link = _generate_booking_link(flight.get('airline', ''), flight_code)
-                print(f"  {flight['airline']} {flight_code}: {booking_link}")
-            
-            print(f"\n✅ Table format test completed successfully!")
-            
+        
+        rendered_routes = 0
+        for route, amadeus_data in zip(ROUTES, results):
+            if print_route_table(amadeus_data, route, future_date, _generate_booking_link):
+                rendered_routes += 1
+        
+        if rendered_routes:
+            print("\n✅ Table format test completed successfully!")
         else:
-            print(f"❌ No flight data found: {amadeus_data.get('error', 'Unknown error')}")
+            print(f"\n❌ Table format test failed: none of the {len(ROUTES)} routes returned flights to render")
         
     except Exception as e:
         print(f"❌ Test failed: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Table format test failed")
 
 if __name__ == "__main__":
     asyncio.run(test_table_format())